@@ -1,15 +1,38 @@
 # app.py
 
 import streamlit as st
-import pandas as pd
-from pathlib import Path
 import plotly.express as px
 import plotly.graph_objects as go
 import os
 import numpy as np
-from datetime import datetime
-from collections import Counter
-import re
+import time
+
+from ingest import get_loader
+from preview import PREVIEW_MIN_ROWS, WEIGHT_COLUMN, preview_label, stratified_sample, submit_exact
+from report import dashboard_report, load_geojson
+from schema import columns_for, date_parser, missing_columns, read_options
+from sections import (
+    CAMPAIGN_PERFORMANCE_COLUMNS,
+    CLAIMS_COLUMNS,
+    KPI_COLUMNS,
+    KPI_OPTIONAL_COLUMNS,
+    TAG_COLUMNS,
+    TIME_COLUMNS,
+    TOP_USERS_COLUMNS,
+    RunningKpis,
+    Section,
+    compute_ages,
+    compute_campaign_performance,
+    compute_claims_over_time,
+    compute_kpis,
+    compute_submissions_over_time,
+    compute_tag_analysis,
+    compute_top_users,
+    run_sections,
+    value_counts_frame,
+    value_counts_series,
+)
+from sketches import daily_cubes, daily_mask
 
 # -----------------------------
 # Dashboard Configuration
@@ -24,10 +47,131 @@ st.set_page_config(
 # Helper Functions
 # -----------------------------
 
-@st.cache_data
+# Independent sections, computed concurrently. Demographics and tag analysis
+# read the full dataset, the other sections the filtered one.
+SECTIONS = [
+    Section('kpis', compute_kpis, KPI_COLUMNS, source='filtered'),
+    Section('submissions_over_time', compute_submissions_over_time, TIME_COLUMNS, source='filtered'),
+    Section('campaign_performance', compute_campaign_performance, CAMPAIGN_PERFORMANCE_COLUMNS, source='filtered'),
+    Section('geo_distribution', value_counts_frame('Wilaya', 'Wilaya'), ('Wilaya',), source='filtered'),
+    Section('user_type_distribution', value_counts_frame('userType', 'User Type'), ('userType',), source='filtered'),
+    Section('status_distribution', value_counts_frame('status_challengeticketsubmissions', 'Status'), ('status_challengeticketsubmissions',), source='filtered'),
+    Section('top_users', compute_top_users, TOP_USERS_COLUMNS, source='filtered'),
+    Section('claims_over_time', compute_claims_over_time, CLAIMS_COLUMNS, source='filtered'),
+    Section('ages', compute_ages, ('Date de naissance',), source='all'),
+    Section('gender_distribution', value_counts_series('Genre'), ('Genre',), source='all'),
+    Section('wilaya_distribution', value_counts_series('Wilaya'), ('Wilaya',), source='all'),
+    Section('country_distribution', value_counts_series('country'), ('country',), source='all'),
+    Section('tag_analysis', compute_tag_analysis, TAG_COLUMNS, source='all'),
+]
+
+# Columns the dashboard cannot do without (filters and KPI cards)
+REQUIRED_COLUMNS = ['createdAt_challengesubmissions', 'title.fr', 'submittedBy.id'] + list(KPI_COLUMNS)
+
+# Distinct counts come from per-day sketches, grouped by campaign (and Wilaya for users)
+DISTINCT_COLUMNS = ['submittedBy.id', 'submission.$oid', 'Wilaya']
+
+# Only the columns used by the sections above are read from the export
+LOAD_COLUMNS = columns_for(SECTIONS, REQUIRED_COLUMNS + list(KPI_OPTIONAL_COLUMNS) + DISTINCT_COLUMNS)
+
+PARTIAL_REFRESH_SECONDS = 0.5
+
+def display_kpis(kpis):
+    """
+    Display the KPI cards.
+
+    Parameters:
+        kpis (dict): KPI values, as returned by `compute_kpis`.
+    """
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Total Submissions", kpis['total_submissions'])
+    col2.metric("Approval Rate", f"{kpis['approval_rate']:.2%}")
+    col3.metric("Total Cashback", f"${kpis['total_cashback']:,.2f}")
+    col4.metric("Avg Cashback per Submission", f"${kpis['avg_cashback']:.2f}")
+
+    # Additional KPIs
+    col5, col6, col7, col8 = st.columns(4)
+    col5.metric("Unique Users", kpis['unique_users'])
+    col6.metric("Conversion Rate", f"{kpis['conversion_rate']:.2%}")
+    col7.metric("Avg Processing Time", f"{kpis['avg_processing_days']:.1f} days" if 'avg_processing_days' in kpis else "N/A")
+    col8.metric("Most Popular Campaign", kpis.get('most_popular_campaign', "N/A"))
+
+def display_submissions_over_time(submissions_over_time, key=None, title='Submissions Over Time'):
+    """
+    Display the submissions-over-time line chart.
+
+    Parameters:
+        submissions_over_time (DataFrame): Submission counts per timestamp.
+        key (str): Optional element key, needed when the chart is redrawn
+            several times in one script run.
+        title (str): Chart title.
+    """
+    st.subheader("📅 Submissions Over Time")
+    fig = px.line(submissions_over_time, x='createdAt_challengesubmissions', y='count', title=title)
+    st.plotly_chart(fig, use_container_width=True, key=key)
+
+def get_distinct_cubes(df, file):
+    """
+    Build the distinct-count cubes for users and submissions, once per upload.
+
+    Users and submissions are grouped by day and campaign, and users also by
+    day and Wilaya (under `users_by_wilaya`). Any date range and campaign
+    selection is then counted by merging the matching sketches.
+
+    Parameters:
+        df (DataFrame): The full loaded dataset.
+        file (UploadedFile): The uploaded file object.
+
+    Returns:
+        dict: `DistinctCube` by counted column, plus `users_by_wilaya`.
+    """
+    cached = st.session_state.get('distinct_cubes')
+    if cached is None or cached[0] != file.file_id:
+        cubes = daily_cubes(df, ['submittedBy.id', 'submission.$oid'], 'createdAt_challengesubmissions', by=['title.fr'])
+        if 'Wilaya' in df.columns:
+            # Kept apart: a day x campaign x Wilaya cube has about one group per row
+            cubes['users_by_wilaya'] = daily_cubes(df, ['submittedBy.id'], 'createdAt_challengesubmissions', by=['Wilaya'])['submittedBy.id']
+        cached = (file.file_id, cubes)
+        st.session_state['distinct_cubes'] = cached
+    return cached[1]
+
+def cube_mask(cube, start_date, end_date, campaign):
+    """
+    Select the cube groups matching the sidebar filters.
+
+    Returns:
+        ndarray: Boolean mask aligned with `cube.keys`.
+    """
+    return daily_mask(cube, start_date, end_date, {} if campaign == "All" else {'title.fr': campaign})
+
+def get_running_kpis(loader, attempt):
+    """
+    Return the running partial-result totals of the upload being loaded.
+
+    They are kept in the session, keyed by the loader and its parse attempt,
+    so a rerun during the load continues from the chunks already folded in,
+    and a restart with another encoding starts them over.
+    """
+    key = (loader.key, attempt)
+    cached = st.session_state.get('running_kpis')
+    if cached is None or cached[0] != key:
+        cached = (key, RunningKpis())
+        st.session_state['running_kpis'] = cached
+    return cached[1]
+
 def load_data(file):
     """
-    Load data from uploaded file based on its extension.
+    Load data from uploaded file on a background worker thread.
+
+    Only the columns used by the dashboard are read, with the dtypes and date
+    formats declared in `schema.py`; sections whose optional columns are
+    missing from the export are skipped.
+
+    While the file is being parsed, a progress bar is shown in the sidebar and
+    the KPI cards and a daily time-series chart are rendered from running
+    totals over the rows parsed so far, marked as partial. The finished load
+    is kept in the session, keyed by the file's content, so reruns and
+    re-uploads of the same file in the session do not parse it again.
 
     Parameters:
         file (UploadedFile): The uploaded file object.
@@ -35,322 +179,378 @@ def load_data(file):
     Returns:
         DataFrame: Loaded pandas DataFrame or None if error occurs.
     """
-    file_extension = Path(file.name).suffix.lower()
-    try:
-        if file_extension in ['.csv', '.txt']:
-            # Try different encodings
-            encodings = ['utf-8', 'ISO-8859-1', 'latin1', 'cp1252']
-            for encoding in encodings:
-                try:
-                    df = pd.read_csv(file, encoding=encoding)
-                    st.sidebar.success(f"Successfully loaded CSV with encoding: {encoding}")
-                    break
-                except UnicodeDecodeError:
-                    continue
-            else:
-                st.sidebar.error("Failed to decode the CSV file with attempted encodings.")
-                return None
-        elif file_extension in ['.xlsx', '.xls']:
-            df = pd.read_excel(file, engine='openpyxl')
-            st.sidebar.success("Successfully loaded Excel file.")
-        else:
-            st.sidebar.error("Unsupported file format. Please upload a CSV or Excel file.")
-            return None
-
-        # Convert date columns to datetime
-        date_columns = ['createdAt_challengesubmissions', 'startDate_challenge', 'endDate_challenge', 'Date de naissance', 'Date de création_user']
-        for col in date_columns:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce')
-
-        return df
-    except Exception as e:
-        st.sidebar.error(f"Error loading file: {str(e)}")
+    loader = get_loader(st.session_state, file, postprocess=date_parser(), read_options=read_options(LOAD_COLUMNS))
+
+    if not loader.done:
+        progress_bar = st.sidebar.progress(0.0, text="Loading file...")
+        partial_area = st.empty()
+        refresh = 0
+        while not loader.done:
+            time.sleep(PARTIAL_REFRESH_SECONDS)
+            progress_bar.progress(loader.progress, text=f"Loaded {loader.rows_read:,} rows ({loader.progress:.0%})")
+            attempt, chunks = loader.new_chunks()
+            running = get_running_kpis(loader, attempt)
+            for chunk in chunks:
+                running.update(chunk)
+            if not chunks or not running.rows:
+                continue
+            refresh += 1
+            with partial_area.container():
+                st.info(f"⏳ Partial results: {loader.rows_read:,} rows loaded so far. The dashboard will update when loading completes.")
+                display_kpis(running.kpis())
+                display_submissions_over_time(running.submissions_over_time(), key=f"partial_submissions_over_time_{refresh}", title='Submissions per Day')
+        progress_bar.empty()
+        partial_area.empty()
+
+    df = loader.result()
+    if df is None:
+        st.sidebar.error(loader.error)
         return None
+    for col, rate in loader.postprocess.failure_rates().items():
+        if rate:
+            st.sidebar.warning(f"{rate:.1%} of '{col}' values could not be parsed as dates.")
+    missing = missing_columns(df, REQUIRED_COLUMNS)
+    if missing:
+        st.sidebar.error(f"Missing required columns: {', '.join(missing)}")
+        return None
+    if loader.encoding:
+        st.sidebar.success(f"Successfully loaded CSV with encoding: {loader.encoding}")
+    else:
+        st.sidebar.success("Successfully loaded Excel file.")
+    return df
 
-# -----------------------------
-# Main Dashboard
-# -----------------------------
+def filter_data(df, start_date, end_date, campaign):
+    """
+    Apply the sidebar date range and campaign filters.
 
-st.title("🌟 Temtem One Market Dashboard")
+    Returns:
+        DataFrame: The matching rows.
+    """
+    mask = (df['createdAt_challengesubmissions'].dt.date >= start_date) & (df['createdAt_challengesubmissions'].dt.date <= end_date)
+    filtered_df = df.loc[mask]
+    if campaign != "All":
+        filtered_df = filtered_df[filtered_df['title.fr'].eq(campaign).fillna(False)]
+    return filtered_df
 
-# Sidebar for file upload and filters
-# st.sidebar.title("📊 Dashboard Controls")
-logo_path = "Logo-temtemOne.svg"  # Replace with your logo file path
+def get_preview_sample(df, file):
+    """
+    Draw the preview sample once per upload, stratified by campaign and Wilaya.
 
-if os.path.exists(logo_path):
-    st.sidebar.image(logo_path, use_column_width=True)
-else:
-    st.sidebar.warning("Logo image not found. Please ensure 'logo.png' is in the project directory.")
+    Returns:
+        DataFrame: The weighted sample, see `stratified_sample`.
+    """
+    cached = st.session_state.get('preview_sample')
+    if cached is None or cached[0] != file.file_id:
+        cached = (file.file_id, stratified_sample(df))
+        st.session_state['preview_sample'] = cached
+    return cached[1]
 
-uploaded_file = st.sidebar.file_uploader("Choose a CSV or Excel file", type=["csv", "xlsx", "xls"])
+def display_dashboard(results, distinct=None, preview=None):
+    """
+    Render every dashboard section from the computed results.
 
-if uploaded_file is not None:
-    df = load_data(uploaded_file)
+    Parameters:
+        results (dict): Section results, as returned by `run_sections`.
+        distinct (dict): Distinct counts for the selection (`users` cube with
+            its `users_mask`, `total_submissions`, `all_campaigns`, and the
+            `users_by_wilaya` cube with its `wilaya_mask`); None in preview mode,
+            where the distinct-count charts are left out.
+        preview (Series): Row weights of the sample when `results` were
+            estimated from one; chart titles then show the estimated error.
+    """
+    def label(title, counts):
+        # Preview charts carry the sampling fraction and estimated error
+        return title + preview_label(counts, preview) if preview is not None else title
+
+    # KPI Cards
+    display_kpis(dict(results['kpis'], unique_users=distinct['users'].count(distinct['users_mask']) if distinct else "…"))
     
-    if df is not None:
-        st.sidebar.success("Data loaded successfully!")
-        
-        # Date range filter
-        min_date = df['createdAt_challengesubmissions'].min().date()
-        max_date = df['createdAt_challengesubmissions'].max().date()
-        start_date, end_date = st.sidebar.date_input(
-            "Select Date Range",
-            value=[min_date, max_date],
-            min_value=min_date,
-            max_value=max_date
-        )
-        
-        # Campaign selector
-        campaigns = df['title.fr'].unique()
-        selected_campaign = st.sidebar.selectbox("Select Campaign", ["All"] + list(campaigns))
-        
-        # Filter data based on selections
-        mask = (df['createdAt_challengesubmissions'].dt.date >= start_date) & (df['createdAt_challengesubmissions'].dt.date <= end_date)
-        filtered_df = df.loc[mask]
-        if selected_campaign != "All":
-            filtered_df = filtered_df[filtered_df['title.fr'] == selected_campaign]
-        
-        # KPI Cards
-        col1, col2, col3, col4 = st.columns(4)
-        col1.metric("Total Submissions", len(filtered_df))
-        col2.metric("Approval Rate", f"{(filtered_df['status_challengeticketsubmissions'] == 'APPROVED').mean():.2%}")
-        col3.metric("Total Cashback", f"${filtered_df['Montant Cashback'].sum():,.2f}")
-        col4.metric("Avg Cashback per Submission", f"${filtered_df['Montant Cashback'].mean():.2f}")
-        
-        # Additional KPIs
-        col5, col6, col7, col8 = st.columns(4)
-        col5.metric("Unique Users", filtered_df['submittedBy.id'].nunique())
-        col6.metric("Conversion Rate", f"{len(filtered_df[filtered_df['status_challengeticketsubmissions'] == 'APPROVED']) / len(filtered_df):.2%}")
-        col7.metric("Avg Processing Time", f"{(filtered_df['createdAt_challengesubmissions'] - filtered_df['startDate_challenge']).mean().days:.1f} days")
-        col8.metric("Most Popular Campaign", filtered_df['title.fr'].mode().iloc[0])
-        
-        # Submissions Over Time
-        st.subheader("📅 Submissions Over Time")
-        submissions_over_time = filtered_df.groupby('createdAt_challengesubmissions').size().reset_index(name='count')
-        fig = px.line(submissions_over_time, x='createdAt_challengesubmissions', y='count', title='Submissions Over Time')
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # Campaign Performance
+    # Submissions Over Time
+    display_submissions_over_time(results['submissions_over_time'], title=label('Submissions Over Time', results['submissions_over_time']['count']))
+    
+    # Campaign Performance
+    if 'campaign_performance' in results:
         st.subheader("🏆 Campaign Performance")
-        campaign_performance = filtered_df.groupby('title.fr').agg({
-            'submission.$oid': 'count',
-            'Montant Cashback': 'sum'
-        }).reset_index()
-        campaign_performance.columns = ['Campaign', 'Submissions', 'Total Cashback']
-        fig = px.bar(campaign_performance, x='Campaign', y=['Submissions', 'Total Cashback'], title='Campaign Performance')
+        campaign_performance = results['campaign_performance']
+        fig = px.bar(campaign_performance, x='Campaign', y=['Submissions', 'Total Cashback'], title=label('Campaign Performance', campaign_performance['Submissions']))
         st.plotly_chart(fig, use_container_width=True)
-        
-        # Geographical Distribution (if 'Wilaya' column exists)
-        if 'Wilaya' in filtered_df.columns:
-            st.subheader("🗺️ Geographical Distribution")
-            geo_distribution = filtered_df['Wilaya'].value_counts().reset_index()
-            geo_distribution.columns = ['Wilaya', 'Count']
-            fig = px.bar(geo_distribution, x='Wilaya', y='Count', title='Submission Distribution by Wilaya')
-            st.plotly_chart(fig, use_container_width=True)
-        
-        # User Type Distribution
-        if 'userType' in filtered_df.columns:
-            st.subheader("👥 User Type Distribution")
-            user_type_dist = filtered_df['userType'].value_counts().reset_index()
-            user_type_dist.columns = ['User Type', 'Count']
-            fig = px.pie(user_type_dist, values='Count', names='User Type', title='User Type Distribution')
+
+        if distinct:
+            users_by_campaign = distinct['users'].count_by('title.fr', distinct['users_mask']).reset_index(name='Unique Users')
+            fig = px.bar(users_by_campaign, x='title.fr', y='Unique Users', labels={'title.fr': 'Campaign'}, title='Unique Users by Campaign')
             st.plotly_chart(fig, use_container_width=True)
-        
-        # Status Distribution
-        if 'status_challengeticketsubmissions' in filtered_df.columns:
-            st.subheader("✅ Submission Status Distribution")
-            status_dist = filtered_df['status_challengeticketsubmissions'].value_counts().reset_index()
-            status_dist.columns = ['Status', 'Count']
-            fig = px.pie(status_dist, values='Count', names='Status', title='Submission Status Distribution')
+    
+    # Geographical Distribution (if 'Wilaya' column exists)
+    if 'geo_distribution' in results:
+        st.subheader("🗺️ Geographical Distribution")
+        geo_distribution = results['geo_distribution']
+        fig = px.bar(geo_distribution, x='Wilaya', y='Count', title=label('Submission Distribution by Wilaya', geo_distribution['Count']))
+        st.plotly_chart(fig, use_container_width=True)
+
+        if distinct and 'users_by_wilaya' in distinct:
+            users_by_wilaya = distinct['users_by_wilaya'].count_by('Wilaya', distinct['wilaya_mask']).reset_index(name='Unique Users')
+            # The per-Wilaya sketches are per day only, not per campaign
+            title = 'Unique Users by Wilaya' if distinct['all_campaigns'] else 'Unique Users by Wilaya (all campaigns)'
+            fig = px.bar(users_by_wilaya, x='Wilaya', y='Unique Users', title=title)
             st.plotly_chart(fig, use_container_width=True)
-        
+    
+    # User Type Distribution
+    if 'user_type_distribution' in results:
+        st.subheader("👥 User Type Distribution")
+        user_type_distribution = results['user_type_distribution']
+        fig = px.pie(user_type_distribution, values='Count', names='User Type', title=label('User Type Distribution', user_type_distribution['Count']))
+        st.plotly_chart(fig, use_container_width=True)
+    
+    # Status Distribution
+    if 'status_distribution' in results:
+        st.subheader("✅ Submission Status Distribution")
+        status_distribution = results['status_distribution']
+        fig = px.pie(status_distribution, values='Count', names='Status', title=label('Submission Status Distribution', status_distribution['Count']))
+        st.plotly_chart(fig, use_container_width=True)
+    
 
-        
-        # Function to get top users
-        def get_top_users(df, n=10):
-            top_users = df.groupby(['submittedBy.id', 'Prenom', 'Nom']).agg({
-                'submission.$oid': 'count',
-                'Montant Cashback': 'sum'
-            }).reset_index()
-            top_users.columns = ['User ID', 'First Name', 'Last Name', 'Submission Count', 'Total Cashback']
-            top_users['Full Name'] = top_users['First Name'] + ' ' + top_users['Last Name']
-            top_users = top_users.sort_values('Submission Count', ascending=False).head(n)
-            return top_users
-        
+    
+    if 'top_users' in results:
         st.subheader("🏆 Top Users Performance")
-        top_users = get_top_users(filtered_df)
+        top_users = results['top_users']
         st.write(top_users[['Full Name', 'Submission Count', 'Total Cashback']])
+        if preview is not None:
+            st.caption(label("Estimated from the sample", top_users['Submission Count']))
 
-        # Calculate and display additional statistics
-        total_submissions = filtered_df['submission.$oid'].nunique()
-        total_cashback = filtered_df['Montant Cashback'].sum()
+        # Display additional statistics
+        total_submissions = distinct['total_submissions'] if distinct else results['kpis']['total_submissions']
+        total_cashback = results['kpis']['total_cashback']
         top_users_submissions = top_users['Submission Count'].sum()
         top_users_cashback = top_users['Total Cashback'].sum()
 
         st.write(f"Top 10 users account for:")
         st.write(f"- {top_users_submissions / total_submissions:.2%} of total submissions")
         st.write(f"- {top_users_cashback / total_cashback:.2%} of total cashback")
+    
+
+
+    # Function to calculate submission status metrics
+    # def get_submission_status_metrics(df):
+    #     total_submissions = len(df)
+    #     approved = df['status_challengeticketsubmissions'].value_counts().get('approved', 0)
+    #     rejected = df['status_challengeticketsubmissions'].value_counts().get('rejected', 0)
+        
+    #     approval_rate = approved / total_submissions
+    #     rejection_rate = rejected / total_submissions
+        
+    #     rejection_reasons = df[df['status_challengeticketsubmissions'] == 'rejected']['rejectReason'].value_counts()
         
+    #     # Calculate processing time (assuming 'createdAt_challengesubmissions' is the submission time)
+    #     # df['processing_time'] = (pd.to_datetime(df['updatedAt_challengeticketsubmissions']) - 
+    #     #                         pd.to_datetime(df['createdAt_challengesubmissions'])).dt.total_seconds() / 3600
+    #     # avg_processing_time = df['processing_time'].mean()
+        
+    #     claim_rate = df['status_challengesubmissions'].value_counts().get('claimed', 0) / total_submissions
+        
+    #     return {
+    #         'approval_rate': approval_rate,
+    #         'rejection_rate': rejection_rate,
+    #         'rejection_reasons': rejection_reasons,
+    #         # 'avg_processing_time': avg_processing_time,
+    #         'claim_rate': claim_rate
+    #     }
 
 
-        # Function to calculate submission status metrics
-        # def get_submission_status_metrics(df):
-        #     total_submissions = len(df)
-        #     approved = df['status_challengeticketsubmissions'].value_counts().get('approved', 0)
-        #     rejected = df['status_challengeticketsubmissions'].value_counts().get('rejected', 0)
-            
-        #     approval_rate = approved / total_submissions
-        #     rejection_rate = rejected / total_submissions
-            
-        #     rejection_reasons = df[df['status_challengeticketsubmissions'] == 'rejected']['rejectReason'].value_counts()
-            
-        #     # Calculate processing time (assuming 'createdAt_challengesubmissions' is the submission time)
-        #     # df['processing_time'] = (pd.to_datetime(df['updatedAt_challengeticketsubmissions']) - 
-        #     #                         pd.to_datetime(df['createdAt_challengesubmissions'])).dt.total_seconds() / 3600
-        #     # avg_processing_time = df['processing_time'].mean()
-            
-        #     claim_rate = df['status_challengesubmissions'].value_counts().get('claimed', 0) / total_submissions
-            
-        #     return {
-        #         'approval_rate': approval_rate,
-        #         'rejection_rate': rejection_rate,
-        #         'rejection_reasons': rejection_reasons,
-        #         # 'avg_processing_time': avg_processing_time,
-        #         'claim_rate': claim_rate
-        #     }
-
-
-        # # Submission Status Metrics
-        # st.subheader("📊 Submission Status Metrics")
-        # metrics = get_submission_status_metrics(filtered_df)
-
-        # col1, col2, col3, col4 = st.columns(4)
-        # col1.metric("Approval Rate", f"{metrics['approval_rate']:.2%}")
-        # col2.metric("Rejection Rate", f"{metrics['rejection_rate']:.2%}")
-        # # col3.metric("Avg. Processing Time", f"{metrics['avg_processing_time']:.2f} hours")
-        # col4.metric("Claim Rate", f"{metrics['claim_rate']:.2%}")
-
-        # Rejection Reasons
-        # st.subheader("Rejection Reasons")
-        # if not metrics['rejection_reasons'].empty:
-        #     fig = px.pie(values=metrics['rejection_reasons'].values, names=metrics['rejection_reasons'].index, title="Rejection Reasons Distribution")
-        #     st.plotly_chart(fig)
-        # else:
-        #     st.write("No rejections in the current data.")
-
-
-
-        # Claims Over Time
-        st.subheader("Claims Over Time")
-        claims_over_time = filtered_df[filtered_df['status_challengesubmissions'] == 'claimed'].groupby(pd.Grouper(key='createdAt_challengesubmissions', freq='D')).size().reset_index(name='count')
-        fig = px.line(claims_over_time, x='createdAt_challengesubmissions', y='count', title="Number of Claims per Day")
-        st.plotly_chart(fig)
+    # # Submission Status Metrics
+    # st.subheader("📊 Submission Status Metrics")
+    # metrics = get_submission_status_metrics(filtered_df)
 
+    # col1, col2, col3, col4 = st.columns(4)
+    # col1.metric("Approval Rate", f"{metrics['approval_rate']:.2%}")
+    # col2.metric("Rejection Rate", f"{metrics['rejection_rate']:.2%}")
+    # # col3.metric("Avg. Processing Time", f"{metrics['avg_processing_time']:.2f} hours")
+    # col4.metric("Claim Rate", f"{metrics['claim_rate']:.2%}")
 
+    # Rejection Reasons
+    # st.subheader("Rejection Reasons")
+    # if not metrics['rejection_reasons'].empty:
+    #     fig = px.pie(values=metrics['rejection_reasons'].values, names=metrics['rejection_reasons'].index, title="Rejection Reasons Distribution")
+    #     st.plotly_chart(fig)
+    # else:
+    #     st.write("No rejections in the current data.")
 
 
 
-        # Function to calculate age
-        def calculate_age(born):
-            today = datetime.now()
-            return today.year - born.year - ((today.month, today.day) < (born.month, born.day))
+    # Claims Over Time
+    if 'claims_over_time' in results:
+        st.subheader("Claims Over Time")
+        claims_over_time = results['claims_over_time']
+        fig = px.line(claims_over_time, x='createdAt_challengesubmissions', y='count', title=label("Number of Claims per Day", claims_over_time['count']))
+        st.plotly_chart(fig)
 
 
 
-        # User Demographics
-        st.subheader("👥 User Demographics")
+    # User Demographics
+    st.subheader("👥 User Demographics")
 
-        # Age Distribution
-        if 'Date de naissance' in df.columns:
-            df['age'] = df['Date de naissance'].apply(calculate_age)
-            st.write("### Age Distribution")
-            fig = px.histogram(df, x='age', nbins=20, title="Age Distribution of Users")
-            st.plotly_chart(fig)
-        else:
-            st.write("Date of birth information is not available in the dataset.")
-
-        # Gender Distribution
-        if 'Genre' in df.columns:
-            st.write("### Gender Distribution")
-            gender_dist = df['Genre'].value_counts()
-            fig = px.pie(values=gender_dist.values, names=gender_dist.index, title="Gender Distribution")
-            st.plotly_chart(fig)
+    # Age Distribution
+    if 'ages' in results:
+        st.write("### Age Distribution")
+        ages = results['ages']
+        if WEIGHT_COLUMN in ages:
+            # Sampled rows are weighted back up to population counts
+            fig = px.histogram(ages, x='age', y=WEIGHT_COLUMN, histfunc='sum', nbins=20, title=label("Age Distribution of Users", ages.groupby('age')[WEIGHT_COLUMN].sum()))
         else:
-            st.write("Gender information is not available in the dataset.")
+            fig = px.histogram(ages, x='age', nbins=20, title="Age Distribution of Users")
+        st.plotly_chart(fig)
+    else:
+        st.write("Date of birth information is not available in the dataset.")
+
+    # Gender Distribution
+    if 'gender_distribution' in results:
+        st.write("### Gender Distribution")
+        gender_dist = results['gender_distribution']
+        fig = px.pie(values=gender_dist.values, names=gender_dist.index, title=label("Gender Distribution", gender_dist))
+        st.plotly_chart(fig)
+    else:
+        st.write("Gender information is not available in the dataset.")
 
-        # Geographical Distribution
-        st.write("### Geographical Distribution")
+    # Geographical Distribution
+    st.write("### Geographical Distribution")
 
-        # By Wilaya
-        if 'Wilaya' in df.columns:
-            st.write("Distribution by Wilaya")
-            wilaya_dist = df['Wilaya'].value_counts()
-            fig = px.bar(x=wilaya_dist.index, y=wilaya_dist.values, title="User Distribution by Wilaya")
-            st.plotly_chart(fig)
-        else:
-            st.write("Wilaya information is not available in the dataset.")
-
-        # By Country
-        if 'country' in df.columns:
-            st.write("Distribution by Country")
-            country_dist = df['country'].value_counts()
-            fig = px.pie(values=country_dist.values, names=country_dist.index, title="User Distribution by Country")
-            st.plotly_chart(fig)
-        else:
-            st.write("Country information is not available in the dataset.")
+    # By Wilaya
+    if 'wilaya_distribution' in results:
+        st.write("Distribution by Wilaya")
+        wilaya_dist = results['wilaya_distribution']
+        fig = px.bar(x=wilaya_dist.index, y=wilaya_dist.values, title=label("User Distribution by Wilaya", wilaya_dist))
+        st.plotly_chart(fig)
+    else:
+        st.write("Wilaya information is not available in the dataset.")
+
+    # By Country
+    if 'country_distribution' in results:
+        st.write("Distribution by Country")
+        country_dist = results['country_distribution']
+        fig = px.pie(values=country_dist.values, names=country_dist.index, title=label("User Distribution by Country", country_dist))
+        st.plotly_chart(fig)
+    else:
+        st.write("Country information is not available in the dataset.")
 
 
 
 
-        # Function to normalize tags
-        def normalize_tag(tag):
-            # Convert to lowercase
-            tag = tag.lower()
-            # Remove leading/trailing whitespace
-            tag = tag.strip()
-            # Remove special characters and replace spaces with underscores
-            tag = re.sub(r'[^\w\s-]', '', tag)
-            tag = re.sub(r'[-\s]+', '_', tag)
-            return tag
+    # Tag Analysis
+    st.subheader("🏷️ Tag Analysis")
 
-        # Tag Analysis
-        st.subheader("🏷️ Tag Analysis")
+    if 'tag_analysis' in results:
+        # Most common tags
+        st.write("### Most Common Tags")
+        top_tags = results['tag_analysis']['top_tags']
+        fig = px.bar(top_tags, x='Tag', y='Count', title=label("Top 10 Most Common Tags", top_tags['Count']))
+        st.plotly_chart(fig)
 
-        if 'tags' in df.columns:
-            # Normalize tags
-            df['normalized_tags'] = df['tags'].apply(lambda x: ','.join([normalize_tag(tag) for tag in x.split(',')]))
+        # Performance of promotions by tag
+        st.write("### Performance of Promotions by Tag")
+        tag_performance = results['tag_analysis']['tag_performance']
 
-            # Most common tags
-            st.write("### Most Common Tags")
-            all_tags = [tag for tags in df['normalized_tags'].str.split(',') for tag in tags]
-            tag_counts = Counter(all_tags)
-            top_tags = pd.DataFrame(tag_counts.most_common(10), columns=['Tag', 'Count'])
+        fig = px.scatter(tag_performance, x='Submission Count', y='Avg Cashback', text='Tag', 
+                        title=label("Tag Performance: Average Cashback vs Submission Count", tag_performance['Submission Count']),
+                        labels={'Submission Count': 'Number of Submissions', 'Avg Cashback': 'Average Cashback Amount'})
+        fig.update_traces(textposition='top center')
+        st.plotly_chart(fig)
 
-            fig = px.bar(top_tags, x='Tag', y='Count', title="Top 10 Most Common Tags")
-            st.plotly_chart(fig)
+        # Table view of tag performance
+        st.write("Tag Performance Table")
+        st.dataframe(tag_performance)
 
-            # Performance of promotions by tag
-            st.write("### Performance of Promotions by Tag")
+    else:
+        st.write("Tag information is not available in the dataset.")
 
-            # Calculate average cashback for each tag
-            tag_performance = df.assign(tags=df['normalized_tags'].str.split(',')).explode('tags')
-            tag_performance = tag_performance.groupby('tags')['Montant Cashback'].agg(['mean', 'count']).reset_index()
-            tag_performance.columns = ['Tag', 'Avg Cashback', 'Submission Count']
-            tag_performance = tag_performance.sort_values('Avg Cashback', ascending=False)
+# -----------------------------
+# Main Dashboard
+# -----------------------------
 
-            fig = px.scatter(tag_performance, x='Submission Count', y='Avg Cashback', text='Tag', 
-                            title="Tag Performance: Average Cashback vs Submission Count",
-                            labels={'Submission Count': 'Number of Submissions', 'Avg Cashback': 'Average Cashback Amount'})
-            fig.update_traces(textposition='top center')
-            st.plotly_chart(fig)
+st.title("🌟 Temtem One Market Dashboard")
 
-            # Table view of tag performance
-            st.write("Tag Performance Table")
-            st.dataframe(tag_performance)
+# Sidebar for file upload and filters
+# st.sidebar.title("📊 Dashboard Controls")
+logo_path = "Logo-temtemOne.svg"  # Replace with your logo file path
 
-        else:
-            st.write("Tag information is not available in the dataset.")
+if os.path.exists(logo_path):
+    st.sidebar.image(logo_path, use_column_width=True)
+else:
+    st.sidebar.warning("Logo image not found. Please ensure 'logo.png' is in the project directory.")
+
+uploaded_file = st.sidebar.file_uploader("Choose a CSV or Excel file", type=["csv", "xlsx", "xls"])
+
+if uploaded_file is not None:
+    df = load_data(uploaded_file)
+    
+    if df is not None:
+        st.sidebar.success("Data loaded successfully!")
+        
+        # Date range filter
+        min_date = df['createdAt_challengesubmissions'].min().date()
+        max_date = df['createdAt_challengesubmissions'].max().date()
+        start_date, end_date = st.sidebar.date_input(
+            "Select Date Range",
+            value=[min_date, max_date],
+            min_value=min_date,
+            max_value=max_date
+        )
+        
+        # Campaign selector
+        campaigns = df['title.fr'].unique()
+        selected_campaign = st.sidebar.selectbox("Select Campaign", ["All"] + list(campaigns))
+        
+        # Preview mode for large exports
+        preview_enabled = st.sidebar.checkbox(
+            "Fast preview for large files",
+            value=True,
+            help=f"Above {PREVIEW_MIN_ROWS:,} rows, charts are first estimated from a stratified sample, then replaced by the exact results.",
+        )
+        
+        # Filter data based on selections
+        filtered_df = filter_data(df, start_date, end_date, selected_campaign)
+        inputs = {'filtered': filtered_df, 'all': df}
+
+        # Sampled preview, shown while the exact sections run in the background
+        exact = None
+        preview_area = st.empty()
+        if preview_enabled and len(df) >= PREVIEW_MIN_ROWS:
+            exact = submit_exact(run_sections, SECTIONS, inputs)
+            # Sections computed on the weighted sample return population estimates
+            sample = get_preview_sample(df, uploaded_file)
+            filtered_sample = filter_data(sample, start_date, end_date, selected_campaign)
+            if not filtered_sample.empty:
+                preview_results = run_sections(SECTIONS, {'filtered': filtered_sample, 'all': sample})
+                with preview_area.container():
+                    st.info(f"⚡ Preview from a {len(sample) / len(df):.1%} sample ({len(sample):,} rows, stratified by campaign and Wilaya). Exact results are being computed...")
+                    display_dashboard(preview_results, preview=sample[WEIGHT_COLUMN])
+
+        # Distinct counts for the selection, merged from the per-day sketches
+        cubes = get_distinct_cubes(df, uploaded_file)
+        users = cubes['submittedBy.id']
+        submissions = cubes['submission.$oid']
+        distinct = {
+            'users': users,
+            'users_mask': cube_mask(users, start_date, end_date, selected_campaign),
+            'total_submissions': submissions.count(cube_mask(submissions, start_date, end_date, selected_campaign)),
+            'all_campaigns': selected_campaign == "All",
+        }
+        if 'users_by_wilaya' in cubes:
+            distinct['users_by_wilaya'] = cubes['users_by_wilaya']
+            distinct['wilaya_mask'] = daily_mask(cubes['users_by_wilaya'], start_date, end_date)
+
+        # Compute all sections concurrently (unless already running), then render them in order
+        results = exact.result() if exact is not None else run_sections(SECTIONS, inputs)
+        preview_area.empty()
+        display_dashboard(results, distinct=distinct)
+
+        # Static HTML export of the current view, rendered from the same results
+        if st.sidebar.button("Export HTML report"):
+            report = dashboard_report(
+                results,
+                unique_users=users.count(distinct['users_mask']),
+                geojson=load_geojson(),
+                subtitle=f"{start_date} to {end_date} · Campaign: {selected_campaign}",
+            )
+            st.sidebar.download_button("Download report", report, file_name="temtem_report.html", mime="text/html")
 
 
 
@@ -1,199 +1,316 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from PIL import Image
 
-# Ajout du logo dans la barre latérale
-logo = Image.open("temtem_logo.png")  # Remplacez 'logo.png' par le chemin de votre logo
-st.sidebar.image(logo, use_column_width=True)
-
-# Titre de l'application avec une police stylée
-st.markdown("<h1 style='text-align: center; color: #2C3E50;'>Analyse des données des soumissions</h1>", unsafe_allow_html=True)
-
-# Ajout d'un sidebar pour les différentes sections de l'entreprise
-section = st.sidebar.selectbox(
-    "Sélectionnez une section",
-    ['Vue globale', 'Marketing', 'Ressources humaines']
+from product_breakdowns import (
+    ALL_PRODUCTS,
+    PRODUCT_COLUMN,
+    precompute_breakdowns,
+    precompute_store_drilldown,
+    read_submissions,
 )
-
-# Chargement du fichier CSV par l'utilisateur
-uploaded_file = st.file_uploader("Choisissez un fichier CSV", type=["csv"])
-
-if uploaded_file is not None:
-    # Charger les données à partir du fichier CSV sélectionné
-    data = pd.read_csv(uploaded_file)
-    
-    # Supprimer les valeurs manquantes dans les colonnes essentielles
-    data = data.dropna(subset=['title.fr', 'Wilaya', 'Genre', 'Date de naissance'])
-
-    # Créer une liste de produits uniques
-    produits = data['title.fr'].unique()
-
-    # Sélection du produit par l'utilisateur
-    produit_selectionne = st.selectbox("Sélectionnez un produit", produits)
-
-    # Filtrer les données en fonction de la sélection de l'utilisateur
-    data_filtered = data[data['title.fr'] == produit_selectionne]
-
-    # Nettoyer les données de Genre
-    data_filtered['Genre'] = data_filtered['Genre'].fillna('Non spécifié')
-
-    # Calculer l'âge des utilisateurs
-    data_filtered['Date de naissance'] = pd.to_datetime(data_filtered['Date de naissance'], errors='coerce')
-    data_filtered['Age'] = pd.Timestamp.now().year - data_filtered['Date de naissance'].dt.year
+from preview import PREVIEW_MIN_ROWS, WEIGHT_COLUMN, preview_label, stratified_sample, submit_exact
+from report import load_geojson, product_report, report_filename
+
+DRILLDOWN_LABELS = {'Wilaya': 'Wilaya', 'commune': 'Commune', 'storeName': 'Magasin'}
+
+
+@st.cache_data
+def load_data(file):
+    # Charger les données à partir du fichier CSV sélectionné, avec des types explicites.
+    # Les valeurs manquantes des colonnes essentielles sont supprimées avant la lecture des dates.
+    data, parser = read_submissions(file)
+    for col, rate in parser.failure_rates().items():
+        if rate:
+            st.warning(f"{rate:.1%} des valeurs de '{col}' n'ont pas pu être lues comme des dates.")
+    return data
+
+
+@st.cache_resource
+def compute_breakdowns(data):
+    # Toutes les répartitions, pour tous les produits, en un seul passage groupé par `title.fr`.
+    # Gardées en mémoire sans copie (lecture seule) : changer de produit est une simple consultation.
+    return precompute_breakdowns(data)
+
+
+@st.cache_resource
+def compute_store_drilldown(data):
+    # Index hiérarchique Wilaya -> commune -> magasin, top-N + "Autres" à chaque niveau
+    return precompute_store_drilldown(data)
+
+
+def display_drilldown(index, root, produit):
+    # Le chemin de navigation est conservé dans la session et réinitialisé au changement de produit
+    state = st.session_state.setdefault('drilldown', {'root': root, 'path': [], 'nav': 0})
+    if state['root'] != root:
+        state.update(root=root, path=[], nav=state['nav'] + 1)
+    path = state['path']
+
+    # Fil d'Ariane : revenir à un niveau supérieur
+    if path:
+        crumbs = ["Toutes les Wilayas"] + path[:-1]
+        for depth, (col, label) in enumerate(zip(st.columns(len(crumbs)), crumbs)):
+            if col.button(f"↩ {label}", key=f"drilldown_crumb_{depth}"):
+                state.update(path=path[:depth], nav=state['nav'] + 1)
+                st.rerun()
+
+    node = root + tuple(path)
+    level = DRILLDOWN_LABELS[index.levels[len(node)]]
+    counts = index.children(node)
+    titre = f"Répartition par {level} pour {produit}" + (f" — {' / '.join(map(str, path))}" if path else "")
+
+    fig = px.bar(counts, x=counts.index, y=counts.values, labels={'x': level, 'y': 'Nombre'}, 
+                 title=titre, color_discrete_sequence=['#FF8C00'])
+    fig.update_xaxes(type='category', tickangle=-90)
+    event = st.plotly_chart(fig, on_select="rerun", selection_mode="points", key=f"drilldown_{state['nav']}")
+
+    # Clic sur une barre : descendre d'un niveau (sauf "Autres" et le dernier niveau)
+    points = event.selection.points if event else []
+    if points and index.can_drill(node, points[0]['x']):
+        state.update(path=path + [points[0]['x']], nav=state['nav'] + 1)
+        st.rerun()
+    if index.can_drill(node, None):
+        st.caption("Cliquez sur une barre pour afficher le niveau suivant.")
+
+
+def display_product(b, produit_selectionne, section, store_drilldown=None, preview=None):
+    # Affiche toutes les répartitions d'un produit. En aperçu (`preview` = poids des
+    # lignes échantillonnées), les titres indiquent l'erreur estimée et la navigation
+    # par magasin, qui dépend des données exactes, n'est pas affichée.
+    def label(titre, counts=()):
+        return titre + preview_label(counts, preview, word="aperçu") if preview is not None else titre
 
     # Visualisations
     st.markdown(f"<h2 style='color: #34495E;'>Section: {section}</h2>", unsafe_allow_html=True)
 
     # Répartition par Genre (Plotly)
-    st.markdown(f"<h3 style='color: #2C3E50;'>1. Répartition par Genre pour {produit_selectionne}</h3>", unsafe_allow_html=True)
-    genre_counts = data_filtered['Genre'].value_counts()
+    if 'genre_counts' in b:
+        st.markdown(f"<h3 style='color: #2C3E50;'>1. Répartition par Genre pour {produit_selectionne}</h3>", unsafe_allow_html=True)
+        genre_counts = b['genre_counts']
 
-    fig = px.bar(genre_counts, x=genre_counts.index, y=genre_counts.values, labels={'x': 'Genre', 'y': 'Nombre'}, 
-                 title=f"Répartition par Genre pour {produit_selectionne}", color_discrete_sequence=['#FF8C00'])
-    st.plotly_chart(fig)
+        fig = px.bar(genre_counts, x=genre_counts.index, y=genre_counts.values, labels={'x': 'Genre', 'y': 'Nombre'}, 
+                     title=label(f"Répartition par Genre pour {produit_selectionne}", genre_counts), color_discrete_sequence=['#FF8C00'])
+        st.plotly_chart(fig)
 
 
 
     # Répartition géographique (Wilaya) (Plotly)
-    st.markdown(f"<h3 style='color: #2C3E50;'>2. Répartition géographique par Wilaya pour {produit_selectionne}</h3>", unsafe_allow_html=True)
-    wilaya_counts = data_filtered['Wilaya'].value_counts()
-
-    fig = px.bar(wilaya_counts, x=wilaya_counts.index, y=wilaya_counts.values, labels={'x': 'Wilaya', 'y': 'Nombre'}, 
-                 title=f"Répartition géographique par Wilaya pour {produit_selectionne}", color_discrete_sequence=['#FF8C00'])
-    fig.update_layout(xaxis_tickangle=-90)
-    st.plotly_chart(fig)
+    if 'wilaya_counts' in b:
+        st.markdown(f"<h3 style='color: #2C3E50;'>2. Répartition géographique par Wilaya pour {produit_selectionne}</h3>", unsafe_allow_html=True)
+        wilaya_counts = b['wilaya_counts']
 
-    # Répartition géographique (Commune) (Nouveau)
-    st.markdown(f"<h3 style='color: #2C3E50;'>3. Répartition par Commune pour {produit_selectionne}</h3>", unsafe_allow_html=True)
-    commune_counts = data_filtered['commune'].value_counts()
+        fig = px.bar(wilaya_counts, x=wilaya_counts.index, y=wilaya_counts.values, labels={'x': 'Wilaya', 'y': 'Nombre'}, 
+                     title=label(f"Répartition géographique par Wilaya pour {produit_selectionne}", wilaya_counts), color_discrete_sequence=['#FF8C00'])
+        fig.update_layout(xaxis_tickangle=-90)
+        st.plotly_chart(fig)
 
-    fig = px.bar(commune_counts, x=commune_counts.index, y=commune_counts.values, labels={'x': 'Commune', 'y': 'Nombre'}, 
-                 title=f"Répartition géographique par Commune pour {produit_selectionne}", color_discrete_sequence=['#FF8C00'])
-    st.plotly_chart(fig)
+    # Répartition géographique (Wilaya -> Commune -> Magasin)
+    if store_drilldown is None:
+        st.caption("La navigation par Commune et magasin sera disponible avec les résultats exacts.")
+    elif produit_selectionne in store_drilldown:
+        st.markdown(f"<h3 style='color: #2C3E50;'>3. Répartition par Commune et magasin pour {produit_selectionne}</h3>", unsafe_allow_html=True)
+        display_drilldown(*store_drilldown[produit_selectionne], produit_selectionne)
 
     # Distribution par tranche d'âge (Plotly)
-    st.markdown(f"<h3 style='color: #2C3E50;'>4. Distribution par tranche d'âge pour {produit_selectionne}</h3>", unsafe_allow_html=True)
-    fig = px.histogram(data_filtered, x="Age", nbins=10, title=f"Distribution d'âge pour {produit_selectionne}", 
-                       labels={'x': 'Âge', 'y': 'Nombre de personnes'}, color_discrete_sequence=['#FF8C00'])
-    st.plotly_chart(fig)
+    if 'age_counts' in b:
+        st.markdown(f"<h3 style='color: #2C3E50;'>4. Distribution par tranche d'âge pour {produit_selectionne}</h3>", unsafe_allow_html=True)
+        age_counts = b['age_counts']
+        fig = px.histogram(x=age_counts.index, y=age_counts.values, histfunc='sum', nbins=10, title=label(f"Distribution d'âge pour {produit_selectionne}", age_counts), 
+                           labels={'x': 'Âge', 'y': 'Nombre de personnes'}, color_discrete_sequence=['#FF8C00'])
+        st.plotly_chart(fig)
 
 
     # Statut des soumissions (Plotly)
-    st.markdown(f"<h3 style='color: #2C3E50;'>6. Statut des soumissions pour {produit_selectionne}</h3>", unsafe_allow_html=True)
-    status_counts = data_filtered['status_challengeticketsubmissions'].value_counts()
+    if 'status_counts' in b:
+        st.markdown(f"<h3 style='color: #2C3E50;'>6. Statut des soumissions pour {produit_selectionne}</h3>", unsafe_allow_html=True)
+        status_counts = b['status_counts']
 
-    fig = px.bar(status_counts, x=status_counts.index, y=status_counts.values, labels={'x': 'Statut', 'y': 'Nombre'}, 
-                 title=f"Statut des soumissions pour {produit_selectionne}", color_discrete_sequence=['#FF8C00'])
-    st.plotly_chart(fig)
+        fig = px.bar(status_counts, x=status_counts.index, y=status_counts.values, labels={'x': 'Statut', 'y': 'Nombre'}, 
+                     title=label(f"Statut des soumissions pour {produit_selectionne}", status_counts), color_discrete_sequence=['#FF8C00'])
+        st.plotly_chart(fig)
 
 
     # Proportion par région et par genre (Tableau croisé et Heatmap)
-    st.markdown(f"<h3 style='color: #2C3E50;'>8. Proportion par région (Wilaya) et genre pour {produit_selectionne}</h3>", unsafe_allow_html=True)
-    wilaya_genre = pd.crosstab(data_filtered['Wilaya'], data_filtered['Genre'])
-    st.write("Tableau croisé (Genre x Wilaya)")
-    st.dataframe(wilaya_genre)
+    if 'wilaya_genre' in b:
+        st.markdown(f"<h3 style='color: #2C3E50;'>8. Proportion par région (Wilaya) et genre pour {produit_selectionne}</h3>", unsafe_allow_html=True)
+        wilaya_genre = b['wilaya_genre']
+        st.write("Tableau croisé (Genre x Wilaya)")
+        st.dataframe(wilaya_genre)
 
-    # Création de la heatmap interactive avec Plotly
-    heatmap_fig = go.Figure(data=go.Heatmap(
-        z=wilaya_genre.values,
-        x=wilaya_genre.columns,
-        y=wilaya_genre.index,
-        colorscale='Oranges'))
+        # Création de la heatmap interactive avec Plotly
+        heatmap_fig = go.Figure(data=go.Heatmap(
+            z=wilaya_genre.values,
+            x=wilaya_genre.columns,
+            y=wilaya_genre.index,
+            colorscale='Oranges'))
 
-    heatmap_fig.update_layout(
-        title=f"Proportion par région (Wilaya) et genre pour {produit_selectionne}",
-        xaxis_title="Genre",
-        yaxis_title="Wilaya")
+        heatmap_fig.update_layout(
+            title=label(f"Proportion par région (Wilaya) et genre pour {produit_selectionne}", wilaya_genre.values.ravel()),
+            xaxis_title="Genre",
+            yaxis_title="Wilaya")
 
-    st.plotly_chart(heatmap_fig)
+        st.plotly_chart(heatmap_fig)
 
 
     # Analyse des segments de marché (Plotly)
-    st.markdown(f"<h3 style='color: #2C3E50;'>10. Répartition par segment pour {produit_selectionne}</h3>", unsafe_allow_html=True)
-    segment_counts = data_filtered['segment'].value_counts()
+    if 'segment_counts' in b:
+        st.markdown(f"<h3 style='color: #2C3E50;'>10. Répartition par segment pour {produit_selectionne}</h3>", unsafe_allow_html=True)
+        segment_counts = b['segment_counts']
 
-    fig = px.bar(segment_counts, x=segment_counts.index, y=segment_counts.values, labels={'x': 'Segment', 'y': 'Nombre'}, 
-                 title=f"Répartition par segment pour {produit_selectionne}", color_discrete_sequence=['#FF8C00'])
-    st.plotly_chart(fig)
+        fig = px.bar(segment_counts, x=segment_counts.index, y=segment_counts.values, labels={'x': 'Segment', 'y': 'Nombre'}, 
+                     title=label(f"Répartition par segment pour {produit_selectionne}", segment_counts), color_discrete_sequence=['#FF8C00'])
+        st.plotly_chart(fig)
 
     # Répartition des magasins (Plotly)
-    st.markdown(f"<h3 style='color: #2C3E50;'>11. Répartition des magasins pour {produit_selectionne}</h3>", unsafe_allow_html=True)
-    store_counts = data_filtered['storeName'].value_counts()
+    if 'store_counts' in b:
+        st.markdown(f"<h3 style='color: #2C3E50;'>11. Répartition des magasins pour {produit_selectionne}</h3>", unsafe_allow_html=True)
+        store_counts = b['store_counts']
 
-    fig = px.bar(store_counts, x=store_counts.index, y=store_counts.values, labels={'x': 'Magasin', 'y': 'Nombre'}, 
-                 title=f"Répartition des magasins pour {produit_selectionne}", color_discrete_sequence=['#FF8C00'])
-    fig.update_layout(xaxis_tickangle=-90)
-    st.plotly_chart(fig)
+        fig = px.bar(store_counts, x=store_counts.index, y=store_counts.values, labels={'x': 'Magasin', 'y': 'Nombre'}, 
+                     title=label(f"Répartition des magasins pour {produit_selectionne}", store_counts), color_discrete_sequence=['#FF8C00'])
+        fig.update_layout(xaxis_tickangle=-90)
+        st.plotly_chart(fig)
 
     # Analyse des tags (Plotly)
-    st.markdown(f"<h3 style='color: #2C3E50;'>12. Analyse des tags pour {produit_selectionne}</h3>", unsafe_allow_html=True)
-    tags = data_filtered['tags'].apply(lambda x: ', '.join(eval(x)) if pd.notna(x) else '')
-    all_tags = ', '.join(tags).split(', ')
-    tag_counts = pd.Series(all_tags).value_counts()
+    if 'tag_counts' in b:
+        st.markdown(f"<h3 style='color: #2C3E50;'>12. Analyse des tags pour {produit_selectionne}</h3>", unsafe_allow_html=True)
+        tag_counts = b['tag_counts']
 
-    fig = px.bar(tag_counts, x=tag_counts.index, y=tag_counts.values, labels={'x': 'Tag', 'y': 'Nombre'}, 
-                 title=f"Analyse des tags pour {produit_selectionne}", color_discrete_sequence=['#FF8C00'])
-    fig.update_layout(xaxis_tickangle=-90)
-    st.plotly_chart(fig)
+        fig = px.bar(tag_counts, x=tag_counts.index, y=tag_counts.values, labels={'x': 'Tag', 'y': 'Nombre'}, 
+                     title=label(f"Analyse des tags pour {produit_selectionne}", tag_counts), color_discrete_sequence=['#FF8C00'])
+        fig.update_layout(xaxis_tickangle=-90)
+        st.plotly_chart(fig)
 
     # Moyenne des montants de cashback par Wilaya (Nouveau)
-    st.markdown(f"<h3 style='color: #2C3E50;'>13. Moyenne des montants de cashback par Wilaya pour {produit_selectionne}</h3>", unsafe_allow_html=True)
-    wilaya_cashback = data_filtered.groupby('Wilaya')['Montant Cashback'].mean().sort_values(ascending=False)
+    if 'wilaya_cashback' in b:
+        st.markdown(f"<h3 style='color: #2C3E50;'>13. Moyenne des montants de cashback par Wilaya pour {produit_selectionne}</h3>", unsafe_allow_html=True)
+        wilaya_cashback = b['wilaya_cashback']
 
-    fig = px.bar(wilaya_cashback, x=wilaya_cashback.index, y=wilaya_cashback.values, labels={'x': 'Wilaya', 'y': 'Montant moyen de Cashback'}, 
-                 title=f"Moyenne des montants de Cashback par Wilaya pour {produit_selectionne}", color_discrete_sequence=['#FF8C00'])
-    st.plotly_chart(fig)
+        fig = px.bar(wilaya_cashback, x=wilaya_cashback.index, y=wilaya_cashback.values, labels={'x': 'Wilaya', 'y': 'Montant moyen de Cashback'}, 
+                     title=label(f"Moyenne des montants de Cashback par Wilaya pour {produit_selectionne}"), color_discrete_sequence=['#FF8C00'])
+        st.plotly_chart(fig)
 
 
 
     # Submissions over time (Nouveau)
-    st.markdown(f"<h3 style='color: #2C3E50;'>15. Nombre de soumissions dans le temps pour {produit_selectionne}</h3>", unsafe_allow_html=True)
-    data_filtered['createdAt_challengesubmissions'] = pd.to_datetime(data_filtered['createdAt_challengesubmissions'], errors='coerce')
-    submissions_over_time = data_filtered.groupby(data_filtered['createdAt_challengesubmissions'].dt.date).size()
+    if 'submissions_over_time' in b:
+        st.markdown(f"<h3 style='color: #2C3E50;'>15. Nombre de soumissions dans le temps pour {produit_selectionne}</h3>", unsafe_allow_html=True)
+        submissions_over_time = b['submissions_over_time']
 
-    fig = px.line(submissions_over_time, x=submissions_over_time.index, y=submissions_over_time.values, 
-                  labels={'x': 'Date', 'y': 'Nombre de soumissions'}, title=f"Nombre de soumissions dans le temps pour {produit_selectionne}")
-    st.plotly_chart(fig)
+        fig = px.line(submissions_over_time, x=submissions_over_time.index, y=submissions_over_time.values, 
+                      labels={'x': 'Date', 'y': 'Nombre de soumissions'}, title=label(f"Nombre de soumissions dans le temps pour {produit_selectionne}", submissions_over_time))
+        st.plotly_chart(fig)
 
     # submissions par user type
-    st.markdown(f"<h3 style='color: #2C3E50;'>Submissions par type d'utilisateur (B2C, B2B)</h3>", unsafe_allow_html=True)
-    if 'userType' in data_filtered.columns:
-        usertype_counts = data_filtered['userType'].value_counts()
+    if 'usertype_counts' in b:
+        st.markdown(f"<h3 style='color: #2C3E50;'>Submissions par type d'utilisateur (B2C, B2B)</h3>", unsafe_allow_html=True)
+        usertype_counts = b['usertype_counts']
         fig = px.bar(usertype_counts, x=usertype_counts.index, y=usertype_counts.values, 
                      labels={'x': 'Type d\'utilisateur', 'y': 'Nombre de soumissions'}, 
-                     title=f"Submissions par type d'utilisateur (B2C, B2B)", color_discrete_sequence=['#FF8C00'])
+                     title=label(f"Submissions par type d'utilisateur (B2C, B2B)", usertype_counts), color_discrete_sequence=['#FF8C00'])
         st.plotly_chart(fig)
 
 
     # Average Age by Wilaya
-    st.markdown(f"<h3 style='color: #2C3E50;'>Âge moyen par Wilaya</h3>", unsafe_allow_html=True)
-    wilaya_age = data_filtered.groupby('Wilaya')['Age'].mean().sort_values(ascending=False)
-    fig = px.bar(wilaya_age, x=wilaya_age.index, y=wilaya_age.values, labels={'x': 'Wilaya', 'y': 'Âge moyen'}, 
-                 title=f"Âge moyen par Wilaya", color_discrete_sequence=['#FF8C00'])
-    st.plotly_chart(fig)
+    if 'wilaya_age' in b:
+        st.markdown(f"<h3 style='color: #2C3E50;'>Âge moyen par Wilaya</h3>", unsafe_allow_html=True)
+        wilaya_age = b['wilaya_age']
+        fig = px.bar(wilaya_age, x=wilaya_age.index, y=wilaya_age.values, labels={'x': 'Wilaya', 'y': 'Âge moyen'}, 
+                     title=label(f"Âge moyen par Wilaya"), color_discrete_sequence=['#FF8C00'])
+        st.plotly_chart(fig)
 
 
     # Submissions by Day of the Week
-    st.markdown(f"<h3 style='color: #2C3E50;'>Soumissions par jour de la semaine</h3>", unsafe_allow_html=True)
-    data_filtered['createdAt_challengesubmissions'] = pd.to_datetime(data_filtered['createdAt_challengesubmissions'], errors='coerce')
-    data_filtered['Day of Week'] = data_filtered['createdAt_challengesubmissions'].dt.day_name()
-    day_of_week_counts = data_filtered['Day of Week'].value_counts()
+    if 'day_of_week_counts' in b:
+        st.markdown(f"<h3 style='color: #2C3E50;'>Soumissions par jour de la semaine</h3>", unsafe_allow_html=True)
+        day_of_week_counts = b['day_of_week_counts']
     
-    fig = px.bar(day_of_week_counts, x=day_of_week_counts.index, y=day_of_week_counts.values, 
-                 labels={'x': 'Jour de la semaine', 'y': 'Nombre de soumissions'}, 
-                 title=f"Soumissions par jour de la semaine", color_discrete_sequence=['#FF8C00'])
-    st.plotly_chart(fig)
+        fig = px.bar(day_of_week_counts, x=day_of_week_counts.index, y=day_of_week_counts.values, 
+                     labels={'x': 'Jour de la semaine', 'y': 'Nombre de soumissions'}, 
+                     title=label(f"Soumissions par jour de la semaine", day_of_week_counts), color_discrete_sequence=['#FF8C00'])
+        st.plotly_chart(fig)
 
     # Top 10 Wilayas by Number of Submissions
-    st.markdown(f"<h3 style='color: #2C3E50;'>Top 10 Wilayas par nombre de soumissions</h3>", unsafe_allow_html=True)
-    top_wilayas = wilaya_counts.nlargest(10)
+    if 'wilaya_counts' in b:
+        st.markdown(f"<h3 style='color: #2C3E50;'>Top 10 Wilayas par nombre de soumissions</h3>", unsafe_allow_html=True)
+        top_wilayas = wilaya_counts.nlargest(10)
     
-    fig = px.bar(top_wilayas, x=top_wilayas.values, y=top_wilayas.index, 
-                 labels={'x': 'Nombre de soumissions', 'y': 'Wilaya'}, orientation='h', 
-                 title=f"Top 10 Wilayas par nombre de soumissions", color_discrete_sequence=['#FF8C00'])
-    st.plotly_chart(fig)
+        fig = px.bar(top_wilayas, x=top_wilayas.values, y=top_wilayas.index, 
+                     labels={'x': 'Nombre de soumissions', 'y': 'Wilaya'}, orientation='h', 
+                     title=label(f"Top 10 Wilayas par nombre de soumissions", top_wilayas), color_discrete_sequence=['#FF8C00'])
+        st.plotly_chart(fig)
+
+
+# Ajout du logo dans la barre latérale
+logo = Image.open("temtem_logo.png")  # Remplacez 'logo.png' par le chemin de votre logo
+st.sidebar.image(logo, use_column_width=True)
+
+# Titre de l'application avec une police stylée
+st.markdown("<h1 style='text-align: center; color: #2C3E50;'>Analyse des données des soumissions</h1>", unsafe_allow_html=True)
+
+# Ajout d'un sidebar pour les différentes sections de l'entreprise
+section = st.sidebar.selectbox(
+    "Sélectionnez une section",
+    ['Vue globale', 'Marketing', 'Ressources humaines']
+)
+
+# Aperçu rapide pour les gros fichiers
+apercu = st.sidebar.checkbox(
+    "Aperçu rapide des gros fichiers",
+    value=True,
+    help=f"Au-delà de {PREVIEW_MIN_ROWS:,} lignes, les graphiques sont d'abord estimés sur un échantillon, puis remplacés par les résultats exacts.",
+)
+
+# Chargement du fichier CSV par l'utilisateur
+uploaded_file = st.file_uploader("Choisissez un fichier CSV", type=["csv"])
+
+if uploaded_file is not None:
+    # Charger les données et précalculer toutes les répartitions (mis en cache)
+    data = load_data(uploaded_file)
+    if PRODUCT_COLUMN not in data.columns:
+        st.error(f"La colonne '{PRODUCT_COLUMN}' est absente du fichier.")
+        st.stop()
+
+    # Répartitions exactes déjà calculées en arrière-plan pour ce fichier
+    exact = st.session_state.get('breakdowns')
+    pending = None
+    if exact is not None and exact[0] == uploaded_file.file_id:
+        breakdowns = exact[1]
+    elif apercu and len(data) >= PREVIEW_MIN_ROWS:
+        # Aperçu sur un échantillon stratifié par produit et Wilaya, pendant le calcul exact
+        pending = submit_exact(precompute_breakdowns, data)
+        # Chaque ligne échantillonnée est pondérée par la taille de sa strate
+        sample = stratified_sample(data)
+        breakdowns = precompute_breakdowns(sample)
+        # Même ordre de produits que les résultats exacts, pour garder la sélection
+        breakdowns = {produit: breakdowns[produit] for produit in list(data[PRODUCT_COLUMN].unique()) + [ALL_PRODUCTS]}
+    else:
+        breakdowns = compute_breakdowns(data)
+
+    # Créer une liste de produits uniques (plus la vue globale)
+    produits = list(breakdowns)
+
+    # Sélection du produit par l'utilisateur
+    produit_selectionne = st.selectbox("Sélectionnez un produit", produits)
+
+    if pending is not None:
+        preview_area = st.empty()
+        with preview_area.container():
+            st.info(f"⚡ Aperçu calculé sur un échantillon de {len(sample) / len(data):.1%} ({len(sample):,} lignes). Calcul exact en cours...")
+            display_product(breakdowns[produit_selectionne], produit_selectionne, section, preview=sample[WEIGHT_COLUMN])
+        breakdowns = pending.result()
+        st.session_state['breakdowns'] = (uploaded_file.file_id, breakdowns)
+        preview_area.empty()
+
+    # Répartitions du produit sélectionné : simple consultation du dictionnaire
+    store_drilldown = compute_store_drilldown(data)
+    display_product(breakdowns[produit_selectionne], produit_selectionne, section, store_drilldown)
+
+    # Export HTML statique de la vue produit (voir `python report.py` pour tous les produits)
+    if st.sidebar.button("Exporter le rapport HTML"):
+        rapport = product_report(breakdowns[produit_selectionne], produit_selectionne, load_geojson())
+        st.sidebar.download_button("Télécharger le rapport", rapport, file_name=report_filename(produit_selectionne), mime="text/html")
 
 
 
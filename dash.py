@@ -1,45 +1,126 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import geopandas as gpd
 import folium
 from streamlit_folium import folium_static
 import json
-from datetime import datetime
-from pathlib import Path
-from collections import Counter
-import re
 import os
+import time
+
+from ingest import get_loader
+from schema import columns_for, date_parser, missing_columns, read_options
+from sections import (
+    CAMPAIGN_PERFORMANCE_COLUMNS,
+    CLAIMS_COLUMNS,
+    KPI_COLUMNS,
+    KPI_OPTIONAL_COLUMNS,
+    TAG_COLUMNS,
+    TIME_COLUMNS,
+    TOP_USERS_COLUMNS,
+    RunningKpis,
+    Section,
+    compute_campaign_performance,
+    compute_claims_over_time,
+    compute_kpis,
+    compute_submissions_over_time,
+    compute_tag_analysis,
+    compute_top_users,
+    run_sections,
+    value_counts_frame,
+    value_counts_series,
+)
+from report import dashboard_report
+from sketches import daily_cubes
 
 # Streamlit Configuration
 st.set_page_config(page_title="🌟 Temtem One Market Dashboard", layout="wide", initial_sidebar_state="expanded")
 
 # Helper Functions
-@st.cache_data
+# Independent sections, computed concurrently and rendered in order
+SECTIONS = [
+    Section('kpis', compute_kpis, KPI_COLUMNS),
+    Section('submissions_over_time', compute_submissions_over_time, TIME_COLUMNS),
+    Section('campaign_performance', compute_campaign_performance, CAMPAIGN_PERFORMANCE_COLUMNS),
+    Section('geo_distribution', value_counts_frame('Wilaya', 'Wilaya'), ('Wilaya',)),
+    Section('user_type_distribution', value_counts_frame('userType', 'User Type'), ('userType',)),
+    Section('status_distribution', value_counts_frame('status_challengeticketsubmissions', 'Status'), ('status_challengeticketsubmissions',)),
+    Section('top_users', compute_top_users, TOP_USERS_COLUMNS),
+    Section('claims_over_time', compute_claims_over_time, CLAIMS_COLUMNS),
+    Section('gender_distribution', value_counts_series('Genre'), ('Genre',)),
+    Section('wilaya_distribution', value_counts_series('Wilaya'), ('Wilaya',)),
+    Section('country_distribution', value_counts_series('country'), ('country',)),
+    Section('tag_analysis', compute_tag_analysis, TAG_COLUMNS),
+]
+
+# Columns the dashboard cannot do without (KPI cards, summary and time series)
+REQUIRED_COLUMNS = list(KPI_COLUMNS + TIME_COLUMNS) + ['submittedBy.id']
+
+# Distinct counts come from per-day, per-campaign sketches
+DISTINCT_COLUMNS = ['submittedBy.id', 'Wilaya']
+
+# Only the columns used by the sections above are read from the export
+LOAD_COLUMNS = columns_for(SECTIONS, REQUIRED_COLUMNS + list(KPI_OPTIONAL_COLUMNS) + DISTINCT_COLUMNS)
+
+PARTIAL_REFRESH_SECONDS = 0.5
+
 def load_data(file):
-    file_extension = Path(file.name).suffix.lower()
-    try:
-        if file_extension in ['.csv', '.txt']:
-            return pd.read_csv(file, encoding="ISO-8859-1")
-        elif file_extension in ['.xlsx', '.xls']:
-            return pd.read_excel(file, engine='openpyxl')
-        else:
-            st.sidebar.error("Unsupported file format. Please upload a CSV or Excel file.")
-    except Exception as e:
-        st.sidebar.error(f"Error loading file: {str(e)}")
-    return None
+    # Parse on a background worker; show progress and partial KPIs/daily time series meanwhile,
+    # from running totals updated with each new chunk (kept in the session across reruns).
+    # Only the schema's columns needed by SECTIONS are read, with explicit dtypes.
+    loader = get_loader(st.session_state, file, encodings=["ISO-8859-1"],
+                        postprocess=date_parser(), read_options=read_options(LOAD_COLUMNS))
+    if not loader.done:
+        progress_bar = st.sidebar.progress(0.0, text="Loading file...")
+        partial_area = st.empty()
+        refresh = 0
+        while not loader.done:
+            time.sleep(PARTIAL_REFRESH_SECONDS)
+            progress_bar.progress(loader.progress, text=f"Loaded {loader.rows_read:,} rows ({loader.progress:.0%})")
+            attempt, chunks = loader.new_chunks()
+            # Totals restart with the loader when it retries another encoding
+            cached = st.session_state.get('running_kpis')
+            if cached is None or cached[0] != (loader.key, attempt):
+                cached = ((loader.key, attempt), RunningKpis())
+                st.session_state['running_kpis'] = cached
+            running = cached[1]
+            for chunk in chunks:
+                running.update(chunk)
+            if not chunks or not running.rows:
+                continue
+            refresh += 1
+            with partial_area.container():
+                st.info(f"⏳ Partial results: {loader.rows_read:,} rows loaded so far. The dashboard will update when loading completes.")
+                display_custom_kpis(running.kpis())
+                display_submissions_over_time(running.submissions_over_time(), key=f"partial_submissions_over_time_{refresh}")
+        progress_bar.empty()
+        partial_area.empty()
+
+    df = loader.result()
+    if df is None:
+        st.sidebar.error(loader.error)
+        return None
+    for col, rate in loader.postprocess.failure_rates().items():
+        if rate:
+            st.sidebar.warning(f"{rate:.1%} of '{col}' values could not be parsed as dates.")
+    missing = missing_columns(df, REQUIRED_COLUMNS)
+    if missing:
+        st.sidebar.error(f"Missing required columns: {', '.join(missing)}")
+        return None
+    return df
+
+def get_distinct_cubes(df, file):
+    # Mergeable distinct-count sketches per day and campaign, built once per upload
+    cached = st.session_state.get('distinct_cubes')
+    if cached is None or cached[0] != file.file_id:
+        cached = (file.file_id, daily_cubes(df, DISTINCT_COLUMNS, 'createdAt_challengesubmissions', by=['title.fr']))
+        st.session_state['distinct_cubes'] = cached
+    return cached[1]
 
 @st.cache_data
 def load_geojson(geojson_path="all-wilayas.geojson"):
     with open(geojson_path, "r") as file:
         return json.load(file)
 
-def preprocess_data(df, date_columns):
-    for col in date_columns:
-        if col in df.columns:
-            df[col] = pd.to_datetime(df[col], errors='coerce')
-    return df
-
 def custom_card(title, value, subtitle, color="#3498DB", border_radius="10px"):
     card_html = f"""
     <div style='background-color: {color}; border-radius: {border_radius}; padding: 20px; text-align: center;'>
@@ -50,11 +131,11 @@ def custom_card(title, value, subtitle, color="#3498DB", border_radius="10px"):
     """
     st.markdown(card_html, unsafe_allow_html=True)
 
-def display_custom_kpis(df):
-    total_submissions = len(df)
-    total_cashback = df['Montant Cashback'].sum()
-    avg_cashback = df['Montant Cashback'].mean()
-    approval_rate = (df['status_challengeticketsubmissions'] == 'APPROVED').mean()
+def display_custom_kpis(kpis):
+    total_submissions = kpis['total_submissions']
+    total_cashback = kpis['total_cashback']
+    avg_cashback = kpis['avg_cashback']
+    approval_rate = kpis['approval_rate']
 
     col1, col2, col3, col4 = st.columns(4)
     with col1:
@@ -66,10 +147,10 @@ def display_custom_kpis(df):
     with col4:
         custom_card("Avg Cashback", f"${avg_cashback:.2f}", "Average cashback per submission", color="#E74C3C")
 
-def display_summary_stats(df):
-    total_submissions = df.shape[0]
-    unique_wilayas = df['Wilaya'].nunique()
-    unique_users = df['submittedBy.id'].nunique()
+def display_summary_stats(kpis, cubes):
+    total_submissions = kpis['total_submissions']
+    unique_wilayas = cubes['Wilaya'].count() if 'Wilaya' in cubes else "N/A"
+    unique_users = cubes['submittedBy.id'].count()
     
     st.subheader('🔎 Summary Statistics')
     col1, col2, col3 = st.columns(3)
@@ -77,8 +158,8 @@ def display_summary_stats(df):
     col2.metric("Unique Wilayas", unique_wilayas)
     col3.metric("Unique Users", unique_users)
 
-def display_wilaya_map(df, wilayas_gdf):
-    wilaya_counts = df['Wilaya'].value_counts().reset_index()
+def display_wilaya_map(geo_distribution, wilayas_gdf):
+    wilaya_counts = geo_distribution.copy()
     wilaya_counts.columns = ['name', 'submission_count']
 
     wilayas_gdf['name'] = wilayas_gdf['name'].str.lower()
@@ -106,9 +187,13 @@ def display_wilaya_map(df, wilayas_gdf):
     st.subheader("🌍 Geographical Distribution of Submissions by Wilaya")
     folium_static(folium_map)
 
-def display_line_chart(df, x, y, title):
+def display_line_chart(df, x, y, title, key=None):
     fig = px.line(df, x=x, y=y, title=title)
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(fig, use_container_width=True, key=key)
+
+def display_submissions_over_time(submissions_over_time, key=None):
+    st.subheader("📅 Submissions Over Time")
+    display_line_chart(submissions_over_time, 'createdAt_challengesubmissions', 'count', 'Submissions Over Time', key=key)
 
 # Sidebar Controls
 st.sidebar.title("📊 Dashboard Controls")
@@ -118,86 +203,66 @@ uploaded_file = st.sidebar.file_uploader("Choose a CSV or Excel file", type=["cs
 if uploaded_file:
     df = load_data(uploaded_file)
     if df is not None:
-        date_columns = ['createdAt_challengesubmissions', 'startDate_challenge', 'endDate_challenge']
-        df = preprocess_data(df, date_columns)
+        # Compute all sections concurrently, then render them in order
+        results = run_sections(SECTIONS, df)
 
         st.title("🌟 Temtem One Market Dashboard")
         st.subheader("✨ Key Performance Indicators")
-        display_custom_kpis(df)
+        display_custom_kpis(results['kpis'])
 
         st.subheader("🔍 Data Overview")
-        display_summary_stats(df)
+        display_summary_stats(results['kpis'], get_distinct_cubes(df, uploaded_file))
 
-        geojson_data = load_geojson()
-        wilayas_gdf = gpd.GeoDataFrame.from_features(geojson_data["features"])
-        display_wilaya_map(df, wilayas_gdf)
+        if 'geo_distribution' in results:
+            geojson_data = load_geojson()
+            wilayas_gdf = gpd.GeoDataFrame.from_features(geojson_data["features"])
+            display_wilaya_map(results['geo_distribution'], wilayas_gdf)
 
-        st.subheader("📅 Submissions Over Time")
-        submissions_over_time = df.groupby('createdAt_challengesubmissions').size().reset_index(name='count')
-        display_line_chart(submissions_over_time, 'createdAt_challengesubmissions', 'count', 'Submissions Over Time')
+        display_submissions_over_time(results['submissions_over_time'])
         
         # Campaign Performance Analysis
-        if 'title.fr' in df.columns:
+        if 'campaign_performance' in results:
             st.subheader("🏆 Campaign Performance")
-            campaign_performance = df.groupby('title.fr').agg({'submission.$oid': 'count', 'Montant Cashback': 'sum'}).reset_index()
-            campaign_performance.columns = ['Campaign', 'Submissions', 'Total Cashback']
-            fig = px.bar(campaign_performance, x='Campaign', y=['Submissions', 'Total Cashback'], title='Campaign Performance')
+            fig = px.bar(results['campaign_performance'], x='Campaign', y=['Submissions', 'Total Cashback'], title='Campaign Performance')
             st.plotly_chart(fig, use_container_width=True)
 
         # Geographical Distribution Analysis
-        if 'Wilaya' in df.columns:
+        if 'geo_distribution' in results:
             st.subheader("🗺️ Geographical Distribution")
-            geo_distribution = df['Wilaya'].value_counts().reset_index()
-            geo_distribution.columns = ['Wilaya', 'Count']
-            fig = px.bar(geo_distribution, x='Wilaya', y='Count', title='Submission Distribution by Wilaya')
+            fig = px.bar(results['geo_distribution'], x='Wilaya', y='Count', title='Submission Distribution by Wilaya')
             st.plotly_chart(fig, use_container_width=True)
 
         # User Type Distribution
-        if 'userType' in df.columns:
+        if 'user_type_distribution' in results:
             st.subheader("👥 User Type Distribution")
-            user_type_dist = df['userType'].value_counts().reset_index()
-            user_type_dist.columns = ['User Type', 'Count']
-            fig = px.pie(user_type_dist, values='Count', names='User Type', title='User Type Distribution')
+            fig = px.pie(results['user_type_distribution'], values='Count', names='User Type', title='User Type Distribution')
             st.plotly_chart(fig, use_container_width=True)
 
         # Submission Status Distribution
-        if 'status_challengeticketsubmissions' in df.columns:
+        if 'status_distribution' in results:
             st.subheader("✅ Submission Status Distribution")
-            status_dist = df['status_challengeticketsubmissions'].value_counts().reset_index()
-            status_dist.columns = ['Status', 'Count']
-            fig = px.pie(status_dist, values='Count', names='Status', title='Submission Status Distribution')
+            fig = px.pie(results['status_distribution'], values='Count', names='Status', title='Submission Status Distribution')
             st.plotly_chart(fig, use_container_width=True)
 
-        # Function to get top users
-        def get_top_users(df, n=10):
-            top_users = df.groupby(['submittedBy.id', 'Prenom', 'Nom']).agg({
-                'submission.$oid': 'count',
-                'Montant Cashback': 'sum'
-            }).reset_index()
-            top_users.columns = ['User ID', 'First Name', 'Last Name', 'Submission Count', 'Total Cashback']
-            top_users['Full Name'] = top_users['First Name'] + ' ' + top_users['Last Name']
-            top_users = top_users.sort_values('Submission Count', ascending=False).head(n)
-            return top_users
-
-        st.subheader("🏆 Top Users Performance")
-        top_users = get_top_users(df)
-        st.write(top_users[['Full Name', 'Submission Count', 'Total Cashback']])
+        if 'top_users' in results:
+            st.subheader("🏆 Top Users Performance")
+            top_users = results['top_users']
+            st.write(top_users[['Full Name', 'Submission Count', 'Total Cashback']])
 
        # Additional Analysis Sections (Tag Analysis, User Demographics, Claims Over Time, etc.)
 
         # Claims Over Time
         st.subheader("📈 Claims Over Time")
-        if 'status_challengesubmissions' in df.columns and 'createdAt_challengesubmissions' in df.columns:
-            claims_over_time = df[df['status_challengesubmissions'] == 'claimed'].groupby(pd.Grouper(key='createdAt_challengesubmissions', freq='D')).size().reset_index(name='count')
-            fig = px.line(claims_over_time, x='createdAt_challengesubmissions', y='count', title="Number of Claims per Day")
+        if 'claims_over_time' in results:
+            fig = px.line(results['claims_over_time'], x='createdAt_challengesubmissions', y='count', title="Number of Claims per Day")
             st.plotly_chart(fig)
 
         # User Demographics
         st.subheader("👥 User Demographics")
 
-        if 'Genre' in df.columns:
+        if 'gender_distribution' in results:
             st.write("### Gender Distribution")
-            gender_dist = df['Genre'].value_counts()
+            gender_dist = results['gender_distribution']
             fig = px.pie(values=gender_dist.values, names=gender_dist.index, title="Gender Distribution")
             st.plotly_chart(fig)
         else:
@@ -207,18 +272,18 @@ if uploaded_file:
         st.write("### Geographical Distribution")
 
         # By Wilaya
-        if 'Wilaya' in df.columns:
+        if 'wilaya_distribution' in results:
             st.write("Distribution by Wilaya")
-            wilaya_dist = df['Wilaya'].value_counts()
+            wilaya_dist = results['wilaya_distribution']
             fig = px.bar(x=wilaya_dist.index, y=wilaya_dist.values, title="User Distribution by Wilaya")
             st.plotly_chart(fig)
         else:
             st.write("Wilaya information is not available in the dataset.")
 
         # By Country
-        if 'country' in df.columns:
+        if 'country_distribution' in results:
             st.write("Distribution by Country")
-            country_dist = df['country'].value_counts()
+            country_dist = results['country_distribution']
             fig = px.pie(values=country_dist.values, names=country_dist.index, title="User Distribution by Country")
             st.plotly_chart(fig)
         else:
@@ -226,42 +291,25 @@ if uploaded_file:
 
 
         # Geographical Distribution by Country
-        if 'country' in df.columns:
+        if 'country_distribution' in results:
             st.write("### Geographical Distribution by Country")
-            country_dist = df['country'].value_counts()
+            country_dist = results['country_distribution']
             fig = px.pie(values=country_dist.values, names=country_dist.index, title="User Distribution by Country")
-            st.plotly_chart(fig)
+            st.plotly_chart(fig, key="country_distribution_repeat")
         else:
             st.write("Country information is not available in the dataset.")
 
         # Tag Analysis
         st.subheader("🏷️ Tag Analysis")
-        if 'tags' in df.columns:
-            # Normalize tags
-            def normalize_tag(tag):
-                tag = tag.lower()
-                tag = tag.strip()
-                tag = re.sub(r'[^\w\s-]', '', tag)
-                tag = re.sub(r'[-\s]+', '_', tag)
-                return tag
-
-            df['normalized_tags'] = df['tags'].apply(lambda x: ','.join([normalize_tag(tag) for tag in x.split(',')]))
-
+        if 'tag_analysis' in results:
             # Most common tags
             st.write("### Most Common Tags")
-            all_tags = [tag for tags in df['normalized_tags'].str.split(',') for tag in tags]
-            tag_counts = Counter(all_tags)
-            top_tags = pd.DataFrame(tag_counts.most_common(10), columns=['Tag', 'Count'])
-
-            fig = px.bar(top_tags, x='Tag', y='Count', title="Top 10 Most Common Tags")
+            fig = px.bar(results['tag_analysis']['top_tags'], x='Tag', y='Count', title="Top 10 Most Common Tags")
             st.plotly_chart(fig)
 
             # Performance of promotions by tag
             st.write("### Performance of Promotions by Tag")
-            tag_performance = df.assign(tags=df['normalized_tags'].str.split(',')).explode('tags')
-            tag_performance = tag_performance.groupby('tags')['Montant Cashback'].agg(['mean', 'count']).reset_index()
-            tag_performance.columns = ['Tag', 'Avg Cashback', 'Submission Count']
-            tag_performance = tag_performance.sort_values('Avg Cashback', ascending=False)
+            tag_performance = results['tag_analysis']['tag_performance']
 
             fig = px.scatter(tag_performance, x='Submission Count', y='Avg Cashback', text='Tag', 
                             title="Tag Performance: Average Cashback vs Submission Count",
@@ -275,6 +323,15 @@ if uploaded_file:
         else:
             st.write("Tag information is not available in the dataset.")
 
+        # Static HTML export, rendered from the same results
+        if st.sidebar.button("Export HTML report"):
+            report = dashboard_report(
+                results,
+                unique_users=get_distinct_cubes(df, uploaded_file)['submittedBy.id'].count(),
+                geojson=load_geojson() if 'geo_distribution' in results else None,
+            )
+            st.sidebar.download_button("Download report", report, file_name="temtem_report.html", mime="text/html")
+
         # Display raw data if checkbox is selected
         if st.checkbox("Show Raw Data"):
             st.subheader("📜 Raw Data")
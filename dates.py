@@ -0,0 +1,159 @@
+# dates.py
+
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# -----------------------------
+# Date Parsing
+# -----------------------------
+
+SAMPLE_SIZE = 1000
+
+# A cached format failing on more than this share of a chunk's non-empty
+# values is re-detected on that chunk.
+REDETECT_RATE = 0.1
+
+# Formats tried, in order, when a column has no (working) declared format.
+# Day-first formats come before month-first ones: exports use the French
+# convention, and the first format parsing the whole sample wins.
+CANDIDATE_FORMATS = [
+    'ISO8601',
+    '%Y-%m-%dT%H:%M:%S.%fZ',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d',
+    '%d/%m/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M',
+    '%d/%m/%Y',
+    '%d-%m-%Y',
+    '%d.%m.%Y',
+    '%m/%d/%Y %H:%M:%S',
+    '%m/%d/%Y',
+    '%Y/%m/%d',
+]
+
+def _sample(values, size=SAMPLE_SIZE):
+    values = values.dropna()
+    if len(values) > size:
+        values = values.iloc[np.linspace(0, len(values) - 1, size).astype(int)]
+    return values.astype(str)
+
+
+def detect_format(values, hint=None):
+    """
+    Find the format parsing the largest share of a sample of `values`.
+
+    Parameters:
+        values (Series): Raw date strings.
+        hint (str): Format to try first, e.g. the one declared in the schema.
+
+    Returns:
+        str: The best format, or None if no candidate parses any value.
+    """
+    sample = _sample(values)
+    if sample.empty:
+        return None
+
+    candidates = [hint] + [fmt for fmt in CANDIDATE_FORMATS if fmt != hint] if hint else CANDIDATE_FORMATS
+    best_format, best_rate = None, 0.0
+    for fmt in candidates:
+        rate = pd.to_datetime(sample, format=fmt, errors='coerce').notna().mean()
+        if rate > best_rate:
+            best_format, best_rate = fmt, rate
+        if rate == 1.0:
+            break
+    return best_format
+
+
+def parse_dates(values, fmt=None, hint=None):
+    """
+    Parse a column of date strings with a single, explicit format.
+
+    The format is detected from a sample when none is given; callers pass
+    the returned format back for the next chunk of the same column, so
+    parsing always takes pandas' vectorized fixed-format path instead of
+    per-element inference. If the given format fails on more than
+    `REDETECT_RATE` of a chunk, the format is detected again on that chunk.
+
+    Every chunk gets the same dtype, naive `datetime64[ns]` in UTC: values
+    with a UTC offset (e.g. ISO strings ending in `Z`) are converted to UTC,
+    so chunks with and without offsets (or all empty) still concatenate
+    into a datetime column.
+
+    Parameters:
+        values (Series): Raw date strings.
+        fmt (str): Format found for the previous chunks, if any.
+        hint (str): Format to try first.
+
+    Returns:
+        tuple: `(parsed, failed, fmt)` where `parsed` is the datetime Series,
+        `failed` the number of non-empty values that could not be parsed and
+        `fmt` the format used (None if none was found).
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return _naive_utc(values), 0, fmt
+
+    given = fmt
+    if fmt is None:
+        fmt = detect_format(values, hint)
+    parsed, failed = _parse(values, fmt)
+
+    if given is not None and failed > REDETECT_RATE * values.notna().sum():
+        detected = detect_format(values, hint)
+        if detected not in (None, given):
+            reparsed, refailed = _parse(values, detected)
+            if refailed < failed:
+                fmt, parsed, failed = detected, reparsed, refailed
+    return parsed, failed, fmt
+
+
+def _naive_utc(parsed):
+    if isinstance(parsed.dtype, pd.DatetimeTZDtype):
+        parsed = parsed.dt.tz_convert('UTC').dt.tz_localize(None)
+    return parsed.astype('datetime64[ns]')
+
+
+def _parse(values, fmt):
+    if fmt is None:
+        parsed = pd.to_datetime(values, errors='coerce', utc=True)
+    else:
+        parsed = pd.to_datetime(values, format=fmt, errors='coerce', utc=True)
+    return _naive_utc(parsed), int((parsed.isna() & values.notna()).sum())
+
+
+class DateParser:
+    """
+    Convert the date columns of successive chunks of one export.
+
+    Instances are callable on a DataFrame, so they can be used as a loader's
+    per-chunk `postprocess`. Each instance remembers the format detected for
+    each column, reused for the export's later chunks, and keeps counts of
+    unparseable values across chunks, reported by `failure_rates()`.
+
+    Parameters:
+        formats (dict): Date columns to convert, mapped to their declared
+            format (or None to detect it).
+    """
+
+    def __init__(self, formats):
+        self.formats = formats
+        self._detected = {}
+        self._failed = Counter()
+        self._total = Counter()
+
+    def __call__(self, df):
+        for name, hint in self.formats.items():
+            if name in df.columns:
+                values = df[name]
+                df[name], failed, self._detected[name] = parse_dates(values, self._detected.get(name), hint)
+                self._failed[name] += failed
+                self._total[name] += int(values.notna().sum())
+        return df
+
+    def failure_rates(self):
+        """
+        Returns:
+            dict: Fraction of non-empty values that failed to parse, by column.
+        """
+        return {name: self._failed[name] / total for name, total in self._total.items() if total}
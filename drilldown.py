@@ -0,0 +1,102 @@
+# drilldown.py
+
+import numpy as np
+import pandas as pd
+
+# -----------------------------
+# Hierarchical Top-N Drilldown
+# -----------------------------
+
+TOP_N = 15
+OTHER_LABEL = "Autres"
+
+
+def top_n_with_other(counts, n=TOP_N, other_label=OTHER_LABEL):
+    """
+    Keep the `n` largest counts and fold the rest into a single "other" entry.
+
+    Parameters:
+        counts (Series): Counts by category.
+        n (int): Number of categories kept.
+        other_label (str): Label of the folded entry.
+
+    Returns:
+        Series: At most `n + 1` counts, largest first, "other" last.
+    """
+    counts = counts.sort_values(ascending=False)
+    if len(counts) <= n:
+        return counts
+    top = counts.iloc[:n]
+    return pd.concat([top, pd.Series({other_label: counts.iloc[n:].sum()})])
+
+
+class DrilldownIndex:
+    """
+    Precomputed top-N-plus-other aggregates for every node of a hierarchy.
+
+    Built once from leaf counts (e.g. submissions per Wilaya, commune and
+    storeName); looking up the children of any node is then an index lookup
+    returning at most `top_n + 1` bars, however many categories exist.
+
+    Parameters:
+        counts (Series): Leaf counts indexed by a MultiIndex whose levels are
+            the hierarchy, outermost first.
+        top_n (int): Number of children kept per node.
+        other_label (str): Label of the bucket holding the remaining children.
+    """
+
+    def __init__(self, counts, top_n=TOP_N, other_label=OTHER_LABEL):
+        self.levels = list(counts.index.names)
+        self.top_n = top_n
+        self.other_label = other_label
+        self._children = [self._reduce(counts, depth) for depth in range(len(self.levels))]
+
+    def _reduce(self, counts, depth):
+        # Aggregate to `depth + 1` levels, then keep the top-N children of every prefix.
+        names = self.levels[:depth + 1]
+        prefix, child = names[:-1], names[-1]
+        if depth + 1 < len(self.levels):
+            counts = counts.groupby(level=names, sort=False).sum()
+        frame = counts.rename('count').reset_index()
+        frame = frame.sort_values(prefix + ['count'], ascending=[True] * len(prefix) + [False])
+
+        rank = frame.groupby(prefix, sort=False).cumcount().to_numpy() if prefix else np.arange(len(frame))
+        top = frame[rank < self.top_n]
+        rest = frame[rank >= self.top_n]
+        if not rest.empty:
+            if prefix:
+                rest = rest.groupby(prefix, sort=False)['count'].sum().reset_index()
+            else:
+                rest = pd.DataFrame({'count': [rest['count'].sum()]})
+            rest[child] = self.other_label
+            top = pd.concat([top, rest], ignore_index=True)
+
+        top[child] = top[child].astype(object)
+        return top.set_index(names)['count'].sort_index()
+
+    def children(self, path=()):
+        """
+        Return the bounded child counts of the node at `path`.
+
+        Parameters:
+            path (tuple): Labels from the root, one per level already drilled.
+
+        Returns:
+            Series: Child counts, largest first with "other" last; empty if
+            `path` is a leaf or unknown.
+        """
+        path = tuple(path)
+        if len(path) >= len(self.levels):
+            return pd.Series(dtype='int64')
+        counts = self._children[len(path)]
+        if path:
+            try:
+                counts = counts.xs(path, level=list(range(len(path))))
+            except KeyError:
+                return pd.Series(dtype='int64')
+        is_other = counts.index == self.other_label
+        return pd.concat([counts[~is_other].sort_values(ascending=False), counts[is_other]])
+
+    def can_drill(self, path, label):
+        """Whether clicking `label` under `path` opens another level."""
+        return label != self.other_label and len(path) + 1 < len(self.levels)
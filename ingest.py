@@ -0,0 +1,230 @@
+# ingest.py
+
+import hashlib
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+# -----------------------------
+# Background Ingestion
+# -----------------------------
+
+CHUNK_ROWS = 50_000
+DEFAULT_ENCODINGS = ['utf-8', 'ISO-8859-1', 'latin1', 'cp1252']
+
+# Shared worker pool: parsing runs off the Streamlit script thread so the
+# page can keep rendering progress and partial results while a file loads.
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ingest")
+
+
+class LoadCancelled(Exception):
+    """Raised on the worker when a loader is cancelled."""
+
+
+class BackgroundLoader:
+    """
+    Parse an uploaded CSV or Excel file on a worker thread, chunk by chunk.
+
+    Newly parsed chunks are handed out as they arrive through `new_chunks()`,
+    so the dashboard can keep running totals and render early, partial
+    results while the load continues. When the load finishes, the chunks are
+    concatenated once into the result frame and the raw upload bytes and
+    chunk list are released.
+
+    If decoding fails part-way through, parsing restarts from the beginning
+    with the next encoding and `attempt` is incremented: totals built from
+    the chunks of an earlier attempt must be discarded.
+
+    Parameters:
+        file (UploadedFile): The uploaded file object.
+        encodings (list): CSV encodings to try, in order.
+        postprocess (callable): Optional function applied to each parsed chunk
+            (e.g. date conversion) before it is published.
+        read_options (dict): Extra keyword arguments for the pandas reader,
+            such as `usecols` and `dtype`.
+        chunk_rows (int): Number of CSV rows parsed per chunk.
+    """
+
+    def __init__(self, file, encodings=None, postprocess=None, read_options=None, chunk_rows=CHUNK_ROWS):
+        self.name = file.name
+        self.key = None  # content key, set by `get_loader`
+        self.extension = Path(file.name).suffix.lower()
+        self._data = file.getvalue()
+        self.total_bytes = len(self._data)
+        self.encodings = encodings or DEFAULT_ENCODINGS
+        self.postprocess = postprocess
+        self.read_options = read_options or {}
+        self.chunk_rows = chunk_rows
+
+        self.bytes_read = 0
+        self.rows_read = 0
+        self.attempt = 0
+        self.encoding = None
+        self.error = None
+        self._cancelled = threading.Event()
+
+        self._chunks = []
+        self._consumed = 0
+        self._frame = None
+        self._lock = threading.Lock()
+        self._future = None
+
+    def start(self):
+        """Submit the parse job to the worker pool (no-op if already started)."""
+        if self._future is None:
+            self._future = _executor.submit(self._run)
+        return self
+
+    def cancel(self):
+        """Stop the load at the next chunk boundary (it then ends with an error)."""
+        self._cancelled.set()
+
+    @property
+    def done(self):
+        return self._future is not None and self._future.done()
+
+    @property
+    def progress(self):
+        """Fraction of the input processed so far, between 0 and 1."""
+        if self.done:
+            return 1.0
+        if not self.total_bytes:
+            return 0.0
+        return min(self.bytes_read / self.total_bytes, 1.0)
+
+    def new_chunks(self):
+        """
+        Return the chunks parsed since the previous call.
+
+        Returns:
+            tuple: `(attempt, chunks)`: the parse attempt the chunks belong to
+            and the new DataFrame chunks (empty once the load has finished
+            and the chunks have been merged into the result).
+        """
+        with self._lock:
+            chunks = self._chunks[self._consumed:]
+            self._consumed = len(self._chunks)
+            return self.attempt, chunks
+
+    def result(self, timeout=None):
+        """
+        Wait for the load to finish.
+
+        Returns:
+            DataFrame: The fully loaded DataFrame (concatenated once, when the
+            load finished), or None if loading failed (see `error`).
+        """
+        self.start()
+        self._future.result(timeout=timeout)
+        if self.error is not None:
+            return None
+        return self._frame
+
+    def _publish(self, chunk, bytes_read):
+        if self._cancelled.is_set():
+            raise LoadCancelled()
+        if self.postprocess is not None:
+            chunk = self.postprocess(chunk)
+        with self._lock:
+            self._chunks.append(chunk)
+            self.rows_read += len(chunk)
+            self.bytes_read = bytes_read
+
+    def _reset(self):
+        with self._lock:
+            self._chunks = []
+            self._consumed = 0
+            self.rows_read = 0
+            self.bytes_read = 0
+            self.attempt += 1
+
+    def _finish(self):
+        # Merge the chunks once, then drop everything but the result frame
+        with self._lock:
+            chunks, self._chunks, self._consumed = self._chunks, [], 0
+        if chunks and self.error is None:
+            self._frame = pd.concat(chunks, ignore_index=True)
+        self._data = None
+
+    def _run(self):
+        try:
+            if self._cancelled.is_set():
+                # Cancelled while waiting for a worker
+                raise LoadCancelled()
+            if self.extension in ['.csv', '.txt']:
+                self._read_csv()
+            elif self.extension in ['.xlsx', '.xls']:
+                # Excel cannot be streamed; it is parsed in one go on the worker.
+                df = pd.read_excel(io.BytesIO(self._data), engine='openpyxl', **self.read_options)
+                self._publish(df, self.total_bytes)
+            else:
+                self.error = "Unsupported file format. Please upload a CSV or Excel file."
+        except LoadCancelled:
+            self.error = "Loading was cancelled."
+        except Exception as e:
+            self.error = f"Error loading file: {str(e)}"
+        finally:
+            self._finish()
+
+    def _read_csv(self):
+        for encoding in self.encodings:
+            buffer = io.BytesIO(self._data)
+            try:
+                reader = pd.read_csv(buffer, encoding=encoding, chunksize=self.chunk_rows, **self.read_options)
+                for chunk in reader:
+                    self._publish(chunk, buffer.tell())
+                self.encoding = encoding
+                return
+            except UnicodeDecodeError:
+                # Decoding can fail part-way through; start over with the next encoding.
+                self._reset()
+                continue
+        self.error = "Failed to decode the CSV file with attempted encodings."
+
+
+def content_key(state, file):
+    """
+    Return a digest of the upload's content, computed once per upload.
+
+    Uploads get a new file id each time, even for the same file; the digest
+    identifies identical content across re-uploads.
+    """
+    file_id = getattr(file, 'file_id', file.name)
+    cached = state.get('ingest_digest')
+    if cached is None or cached[0] != file_id:
+        cached = (file_id, hashlib.blake2b(file.getvalue(), digest_size=16).hexdigest())
+        state['ingest_digest'] = cached
+    return cached[1]
+
+
+def get_loader(state, file, **kwargs):
+    """
+    Return the background loader for `file`, starting one if needed.
+
+    Loaders are kept in `state` (typically `st.session_state`) keyed by the
+    upload's content, so reruns of the script and re-uploads of the same file
+    in the session reuse the in-flight or finished load instead of parsing
+    the file again. Loaders for other files are cancelled and dropped, so a
+    replaced upload stops using a worker.
+
+    Parameters:
+        state (MutableMapping): Per-session storage.
+        file (UploadedFile): The uploaded file object.
+        **kwargs: Forwarded to `BackgroundLoader`.
+
+    Returns:
+        BackgroundLoader: The started loader; its `key` identifies the content.
+    """
+    key = f"ingest::{content_key(state, file)}"
+    loader = state.get(key)
+    if loader is None:
+        # Only the current upload is kept; stop and drop loaders for replaced files.
+        for stale in [k for k in state.keys() if str(k).startswith("ingest::")]:
+            state.pop(stale).cancel()
+        loader = BackgroundLoader(file, **kwargs).start()
+        loader.key = key
+        state[key] = loader
+    return loader
@@ -0,0 +1,102 @@
+# preview.py
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# -----------------------------
+# Sampled Preview
+# -----------------------------
+
+PREVIEW_MIN_ROWS = 500_000
+PREVIEW_FRACTION = 0.05
+PREVIEW_STRATA = ['title.fr', 'Wilaya']
+CONFIDENCE_Z = 1.96  # 95% interval
+WEIGHT_COLUMN = 'weight'  # rows of the population each sampled row stands for
+
+# Exact computations run here while the preview is on screen.
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="exact")
+
+
+def submit_exact(fn, *args, **kwargs):
+    """Run the exact computation in the background; returns a Future."""
+    return _executor.submit(fn, *args, **kwargs)
+
+
+def stratified_sample(df, strata=PREVIEW_STRATA, fraction=PREVIEW_FRACTION, seed=0):
+    """
+    Draw about the same fraction of rows from every stratum (at least one row each).
+
+    Small strata are oversampled by the one-row minimum (and the rounding
+    up), so each sampled row carries the weight `N_h / n_h` of its stratum:
+    the number of rows it stands for. Weighted sums of the sample estimate
+    the population totals without bias, stratum by stratum.
+
+    Parameters:
+        df (DataFrame): Rows to sample.
+        strata (list): Stratification columns; absent ones are ignored.
+        fraction (float): Share of rows kept per stratum.
+        seed (int): Random seed, so reruns show the same preview.
+
+    Returns:
+        DataFrame: The sampled rows, with their weight in `WEIGHT_COLUMN`.
+    """
+    strata = [col for col in strata if col in df.columns]
+    shuffled = df.iloc[np.random.default_rng(seed).permutation(len(df))]
+    if strata:
+        grouped = shuffled.groupby(strata, sort=False, dropna=False, observed=True)
+        rank = grouped.cumcount()
+        size = grouped[strata[0]].transform('size')
+        quota = np.ceil(size * fraction)
+        kept = rank < quota
+        sample = shuffled[kept].assign(**{WEIGHT_COLUMN: (size / quota)[kept]})
+    else:
+        quota = int(np.ceil(len(df) * fraction))
+        sample = shuffled.iloc[:quota].assign(**{WEIGHT_COLUMN: len(df) / max(quota, 1)})
+    return sample.sort_index()
+
+
+def effective_weight(weights):
+    """
+    Average weight of the population's rows, `sum(w**2) / sum(w)`.
+
+    A count of `Y` rows spread across strata like the population is then
+    estimated from about `Y / effective_weight` sampled rows. It equals
+    `1 / fraction` when all strata are sampled at the same rate, and grows
+    with the spread of the weights.
+    """
+    weights = np.asarray(weights, dtype=float)
+    return (weights ** 2).sum() / weights.sum()
+
+
+def relative_error(counts, weights):
+    """
+    Estimated relative error (95%) of a typical weighted count.
+
+    Uses the median of `counts` and the variance of a weighted count,
+    `sum(w * (w - 1))` over its sampled rows, approximated with the sample's
+    `effective_weight`. Counts broken down by the stratification columns are
+    more accurate than this bound.
+
+    Parameters:
+        counts (Series or array): Estimated counts shown in a chart.
+        weights (Series or array): Row weights of the sample.
+
+    Returns:
+        float: Relative error, e.g. 0.08 for ±8%; NaN if there are no counts.
+    """
+    counts = np.asarray(counts, dtype=float)
+    counts = counts[counts > 0]
+    excess = max(effective_weight(weights) - 1, 0.0)
+    if counts.size == 0 or excess == 0:
+        return 0.0 if excess == 0 else np.nan
+    return CONFIDENCE_Z * np.sqrt(excess / max(np.median(counts), 1.0))
+
+
+def preview_label(counts, weights, word="preview"):
+    """Chart title suffix describing the preview and its estimated error."""
+    fraction = len(weights) / np.sum(weights)
+    error = relative_error(counts, weights)
+    if np.isnan(error):
+        return f" ({word} {fraction:.0%})"
+    return f" ({word} {fraction:.0%}, ±{error:.0%})"
@@ -0,0 +1,229 @@
+# product_breakdowns.py
+
+from ast import literal_eval
+from functools import cache
+
+import pandas as pd
+
+from drilldown import DrilldownIndex, top_n_with_other
+from preview import WEIGHT_COLUMN
+from schema import SUBMISSIONS_SCHEMA, date_parser, read_options
+
+# -----------------------------
+# Per-Product Breakdowns
+# -----------------------------
+
+PRODUCT_COLUMN = 'title.fr'
+ALL_PRODUCTS = "Tous les produits"
+UNSPECIFIED = "Non spécifié"  # label of missing values kept in a breakdown
+
+
+def _split_by_product(grouped, sort=True):
+    """
+    Split a Series indexed by (product, ...) into one Series per product,
+    plus the all-products total under `ALL_PRODUCTS`.
+    """
+    by_product = {}
+    for product, values in grouped.groupby(level=0, sort=False):
+        values = values.droplevel(0)
+        by_product[product] = values.sort_values(ascending=False) if sort else values.sort_index()
+
+    total = grouped.groupby(level=list(range(1, grouped.index.nlevels))).sum()
+    by_product[ALL_PRODUCTS] = total.sort_values(ascending=False) if sort else total.sort_index()
+    return by_product
+
+
+def _size(data, keys):
+    # Rows per group; on a weighted sample (see `preview.stratified_sample`),
+    # their summed weights, i.e. the estimated rows in the full dataset
+    grouped = data.groupby(keys, sort=False, observed=True)
+    if WEIGHT_COLUMN not in data.columns:
+        return grouped.size()
+    return grouped[WEIGHT_COLUMN].sum().round().astype('int64')
+
+
+def _keep(data, columns):
+    # Select `columns`, plus the row weights of a weighted sample
+    return data[[col for col in (*columns, WEIGHT_COLUMN) if col in data.columns]]
+
+
+def _counts(data, column, sort=True):
+    counts = _size(data, [PRODUCT_COLUMN, column])
+    return _split_by_product(counts, sort=sort)
+
+
+def _means(data, key, value):
+    """Mean of `value` per `key` for every product, from one grouped sum/count pass."""
+    if WEIGHT_COLUMN in data.columns:
+        weights = data[WEIGHT_COLUMN].where(data[value].notna(), 0)
+        data = data.assign(**{value: data[value] * weights, WEIGHT_COLUMN: weights})
+        sums = data.groupby([PRODUCT_COLUMN, key], sort=False, observed=True)[[value, WEIGHT_COLUMN]].sum()
+        sums.columns = ['sum', 'count']
+    else:
+        sums = data.groupby([PRODUCT_COLUMN, key], sort=False, observed=True)[value].agg(['sum', 'count'])
+    totals = _split_by_product(sums['sum'], sort=False)
+    counts = _split_by_product(sums['count'], sort=False)
+    return {
+        product: (totals[product] / counts[product]).dropna().sort_values(ascending=False)
+        for product in totals
+    }
+
+
+def _crosstabs(data, index, columns):
+    counts = _size(data, [PRODUCT_COLUMN, index, columns])
+    return {
+        product: values.unstack(fill_value=0).sort_index().sort_index(axis=1)
+        for product, values in _split_by_product(counts, sort=False).items()
+    }
+
+
+def _parse_tags(value):
+    return literal_eval(value) if pd.notna(value) else []
+
+
+def _ages(data):
+    ages = _keep(data, [col for col in (PRODUCT_COLUMN, 'Wilaya') if col in data.columns]).copy()
+    ages['Age'] = pd.Timestamp.now().year - pd.to_datetime(data['Date de naissance'], errors='coerce').dt.year
+    return ages
+
+
+def _dates(data):
+    created_at = pd.to_datetime(data['createdAt_challengesubmissions'], errors='coerce')
+    return _keep(data, [PRODUCT_COLUMN]).assign(**{'Date': created_at.dt.date, 'Day of Week': created_at.dt.day_name()})
+
+
+def _tags(data):
+    # Tags are serialized Python lists; rows without tags count as an empty tag.
+    tags = _keep(data, [PRODUCT_COLUMN]).assign(tag=data['tags'].apply(_parse_tags)).explode('tag')
+    tags['tag'] = tags['tag'].fillna('')
+    return tags
+
+
+# Columns read by each breakdown; breakdowns whose columns are missing are skipped.
+BREAKDOWN_COLUMNS = {
+    'genre_counts': ('Genre',),
+    'wilaya_counts': ('Wilaya',),
+    'age_counts': ('Date de naissance',),
+    'status_counts': ('status_challengeticketsubmissions',),
+    'wilaya_genre': ('Wilaya', 'Genre'),
+    'segment_counts': ('segment',),
+    'store_counts': ('storeName',),
+    'tag_counts': ('tags',),
+    'wilaya_cashback': ('Wilaya', 'Montant Cashback'),
+    'submissions_over_time': ('createdAt_challengesubmissions',),
+    'usertype_counts': ('userType',),
+    'wilaya_age': ('Wilaya', 'Date de naissance'),
+    'day_of_week_counts': ('createdAt_challengesubmissions',),
+}
+DRILLDOWN_COLUMNS = ('Wilaya', 'commune', 'storeName')
+
+# Columns read from the export: only those used by the breakdowns and the drilldown
+LOAD_COLUMNS = [
+    column.name for column in SUBMISSIONS_SCHEMA
+    if column.name == PRODUCT_COLUMN
+    or column.name in DRILLDOWN_COLUMNS
+    or any(column.name in columns for columns in BREAKDOWN_COLUMNS.values())
+]
+# Rows missing one of these are dropped before computing the breakdowns
+ESSENTIAL_COLUMNS = ['title.fr', 'Wilaya', 'Genre', 'Date de naissance']
+
+
+def read_submissions(source):
+    """
+    Read an export for the product breakdowns.
+
+    Rows missing an essential column are dropped on the raw values, before
+    the dates are parsed: a birth date that fails to parse only leaves its
+    row out of the age breakdowns, not out of every breakdown.
+
+    Parameters:
+        source (str, path or file): CSV to read.
+
+    Returns:
+        tuple: `(data, parser)`; the parser's `failure_rates()` report the
+        dates that could not be parsed.
+    """
+    data = pd.read_csv(source, **read_options(LOAD_COLUMNS))
+    data = data.dropna(subset=[col for col in ESSENTIAL_COLUMNS if col in data.columns])
+    parser = date_parser()
+    return parser(data), parser
+
+
+def precompute_breakdowns(data):
+    """
+    Compute every product breakdown shown in app7.py, for all products at once.
+
+    Each breakdown is computed in a single grouped pass over the whole
+    dataset, partitioned by `title.fr`, so switching the selected product is a
+    dictionary lookup. The all-products view is derived from the same grouped
+    results and stored under `ALL_PRODUCTS`. Breakdowns whose columns are
+    missing from `data` are left out.
+
+    Parameters:
+        data (DataFrame): Cleaned submissions, or a weighted sample of them
+            (see `preview.stratified_sample`): counts and averages are then
+            weighted estimates for the full dataset.
+
+    Returns:
+        dict: Breakdowns by product, each a dict of breakdown name to Series
+        (or DataFrame for the Wilaya x Genre crosstab).
+    """
+    # Derived frames shared by several breakdowns are computed once, on first use
+    ages = cache(lambda: _ages(data))
+    dates = cache(lambda: _dates(data))
+
+    computations = {
+        'genre_counts': lambda: _counts(data.assign(Genre=data['Genre'].fillna(UNSPECIFIED)), 'Genre'),
+        'wilaya_counts': lambda: _counts(data, 'Wilaya'),
+        'age_counts': lambda: _counts(ages(), 'Age', sort=False),
+        'status_counts': lambda: _counts(data, 'status_challengeticketsubmissions'),
+        'wilaya_genre': lambda: _crosstabs(data, 'Wilaya', 'Genre'),
+        'segment_counts': lambda: _counts(data, 'segment'),
+        'store_counts': lambda: {product: top_n_with_other(counts) for product, counts in _counts(data, 'storeName').items()},
+        'tag_counts': lambda: _counts(_tags(data), 'tag'),
+        'wilaya_cashback': lambda: _means(data, 'Wilaya', 'Montant Cashback'),
+        'submissions_over_time': lambda: _counts(dates(), 'Date', sort=False),
+        'usertype_counts': lambda: _counts(data, 'userType'),
+        'wilaya_age': lambda: _means(ages(), 'Wilaya', 'Age'),
+        'day_of_week_counts': lambda: _counts(dates(), 'Day of Week'),
+    }
+    breakdowns = {
+        name: compute()
+        for name, compute in computations.items()
+        if all(col in data.columns for col in BREAKDOWN_COLUMNS[name])
+    }
+
+    products = list(data[PRODUCT_COLUMN].unique()) + [ALL_PRODUCTS]
+    # Products without rows for a breakdown get an empty one of the same kind
+    empty = {name: pd.DataFrame(dtype='int64') if name == 'wilaya_genre' else pd.Series(dtype='int64') for name in breakdowns}
+    return {
+        product: {name: values.get(product, empty[name]) for name, values in breakdowns.items()}
+        for product in products
+    }
+
+
+def precompute_store_drilldown(data):
+    """
+    Build the Wilaya -> commune -> storeName drilldown for all products at once.
+
+    Parameters:
+        data (DataFrame): Cleaned submissions.
+
+    Returns:
+        dict: For each product (and `ALL_PRODUCTS`), the `(DrilldownIndex,
+        root path)` pair to navigate from. Products share one index over
+        (title.fr, Wilaya, commune, storeName), rooted at the product. Empty
+        if any of `DRILLDOWN_COLUMNS` is missing. Missing communes and stores
+        are counted under `UNSPECIFIED`, so every level sums to the
+        product's submissions.
+    """
+    if not all(col in data.columns for col in DRILLDOWN_COLUMNS):
+        return {}
+    data = data.assign(**{col: data[col].fillna(UNSPECIFIED) for col in DRILLDOWN_COLUMNS})
+    leaf_counts = data.groupby([PRODUCT_COLUMN, 'Wilaya', 'commune', 'storeName'], sort=False, observed=True).size()
+    by_product = DrilldownIndex(leaf_counts)
+    all_products = DrilldownIndex(leaf_counts.groupby(level=[1, 2, 3], sort=False).sum())
+
+    roots = {product: (by_product, (product,)) for product in data[PRODUCT_COLUMN].unique()}
+    roots[ALL_PRODUCTS] = (all_products, ())
+    return roots
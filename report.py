@@ -0,0 +1,436 @@
+# report.py
+
+import argparse
+import html
+import json
+import math
+import re
+import unicodedata
+from datetime import date, datetime
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from product_breakdowns import precompute_breakdowns, read_submissions
+
+# -----------------------------
+# Static HTML Report
+# -----------------------------
+
+WILAYAS_GEOJSON = "all-wilayas.geojson"
+ALGERIA_CENTER = {'lat': 28.0339, 'lon': 1.6596}
+ORANGE = ['#FF8C00']
+
+PAGE_STYLE = """
+body { font-family: Arial, sans-serif; background: #F0F2F6; color: #2C3E50; margin: 0 auto; max-width: 1200px; padding: 20px; }
+h1 { text-align: center; }
+.subtitle { text-align: center; color: #7F8C8D; }
+.cards { display: flex; flex-wrap: wrap; gap: 16px; margin: 20px 0; }
+.card { flex: 1 1 200px; border-radius: 10px; padding: 20px; text-align: center; color: white; }
+.card h3 { margin: 0; font-size: 16px; }
+.card .value { font-size: 30px; font-weight: bold; margin: 10px 0; }
+.card p { margin: 0; font-size: 14px; }
+.block { background: white; border-radius: 10px; padding: 10px 20px; margin: 20px 0; }
+table { border-collapse: collapse; width: 100%; }
+th, td { padding: 6px 10px; border-bottom: 1px solid #DDD; text-align: left; }
+"""
+
+
+class Card(NamedTuple):
+    """
+    A KPI card of the report.
+
+    Attributes:
+        title (str): Card heading.
+        value (str): Formatted value.
+        subtitle (str): Short description under the value.
+        color (str): Background color.
+    """
+    title: str
+    value: str
+    subtitle: str = ""
+    color: str = "#3498DB"
+
+
+class Block(NamedTuple):
+    """
+    A report section: a Plotly figure, or a DataFrame rendered as a table.
+
+    Attributes:
+        heading (str): Section heading.
+        content (Figure or DataFrame): What the section shows.
+    """
+    heading: str
+    content: object
+
+
+def load_geojson(path=WILAYAS_GEOJSON):
+    """Load the Wilaya boundaries, or return None if the file is not there."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+def wilaya_choropleth(counts, geojson, title, label="Submissions"):
+    """
+    Build a Wilaya choropleth drawn without map tiles, so it works offline.
+
+    Parameters:
+        counts (Series): Values by Wilaya name (matched case-insensitively
+            to the GeoJSON `name` property).
+        geojson (dict): Wilaya boundaries.
+        title (str): Figure title.
+        label (str): Color scale label.
+
+    Returns:
+        Figure: The choropleth.
+    """
+    names = {str(feature['properties']['name']).lower(): feature['properties']['name'] for feature in geojson['features']}
+    counts = counts.groupby(counts.index.astype(str).str.lower().map(names)).sum()
+    fig = px.choropleth_mapbox(
+        locations=counts.index, color=counts.values, geojson=geojson, featureidkey='properties.name',
+        color_continuous_scale='YlOrRd', opacity=0.7, mapbox_style='white-bg',
+        center=ALGERIA_CENTER, zoom=4, labels={'locations': 'Wilaya', 'color': label}, title=title,
+    )
+    fig.update_layout(height=600)
+    return fig
+
+
+def _bar(counts, x_label, y_label, title):
+    return px.bar(counts, x=counts.index, y=counts.values, labels={'x': x_label, 'y': y_label},
+                  title=title, color_discrete_sequence=ORANGE)
+
+
+def _jsonable(value):
+    # Aggregates -> plain JSON types (frames and series in pandas' "split" layout)
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return json.loads(value.to_json(orient='split', date_format='iso', default_handler=str))
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (datetime, date, pd.Timedelta)):
+        return str(value)
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def render_report(title, cards, blocks, aggregates, subtitle=None):
+    """
+    Render a self-contained HTML report.
+
+    plotly.js is inlined once, before the first figure, so the file has no
+    external dependency; the aggregates the report was built from are
+    embedded as JSON in a `<script id="report-data">` element.
+
+    Parameters:
+        title (str): Page title.
+        cards (list): `Card`s shown at the top.
+        blocks (list): `Block`s, in display order.
+        aggregates (dict): Aggregates to embed.
+        subtitle (str): Optional line under the title (e.g. the filters).
+
+    Returns:
+        str: The HTML document.
+    """
+    generated = f"{datetime.now():%Y-%m-%d %H:%M}"
+    subtitle = f"{subtitle} · {generated}" if subtitle else generated
+
+    card_html = "".join(
+        f"<div class='card' style='background-color: {card.color};'><h3>{html.escape(card.title)}</h3>"
+        f"<div class='value'>{html.escape(card.value)}</div><p>{html.escape(card.subtitle)}</p></div>"
+        for card in cards
+    )
+
+    body = []
+    include_plotlyjs = True
+    for block in blocks:
+        if isinstance(block.content, pd.DataFrame):
+            content = block.content.to_html(index=False, border=0, float_format=lambda x: f"{x:,.2f}")
+        else:
+            content = pio.to_html(block.content, full_html=False, include_plotlyjs=include_plotlyjs,
+                                  config={'displaylogo': False})
+            include_plotlyjs = False
+        body.append(f"<div class='block'><h2>{html.escape(block.heading)}</h2>{content}</div>")
+
+    # "</" would end the script element early
+    data = json.dumps(_jsonable(aggregates), ensure_ascii=False).replace("</", "<\\/")
+
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{html.escape(title)}</title>
+<style>{PAGE_STYLE}</style>
+</head>
+<body>
+<h1>{html.escape(title)}</h1>
+<p class="subtitle">{html.escape(subtitle)}</p>
+<div class="cards">{card_html}</div>
+{"".join(body)}
+<script type="application/json" id="report-data">{data}</script>
+</body>
+</html>
+"""
+
+
+def report_filename(name):
+    """File name for the report of `name` (a product, a campaign...)."""
+    ascii_name = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode()
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', ascii_name).strip('-').lower()
+    return f"rapport_{slug or 'produit'}.html"
+
+# -----------------------------
+# Dashboard Report (app.py, dash.py)
+# -----------------------------
+
+def dashboard_report(results, unique_users=None, geojson=None, title="Temtem One Market Dashboard", subtitle=None):
+    """
+    Render the submissions dashboard as a static HTML report.
+
+    Parameters:
+        results (dict): Section results, as returned by `run_sections`.
+        unique_users (int): Distinct users for the same selection, if known.
+        geojson (dict): Wilaya boundaries for the choropleth; the map is left
+            out when None.
+        title (str): Page title.
+        subtitle (str): Optional description of the selection.
+
+    Returns:
+        str: The HTML document.
+    """
+    kpis = results['kpis']
+    cards = [
+        Card("Total Submissions", f"{kpis['total_submissions']:,}", "Submissions in selection", "#1ABC9C"),
+        Card("Total Cashback", f"${kpis['total_cashback']:,.2f}", "Cashback awarded", "#F39C12"),
+        Card("Approval Rate", f"{kpis['approval_rate']:.2%}", "Approval rate of submissions", "#3498DB"),
+        Card("Avg Cashback", f"${kpis['avg_cashback']:.2f}", "Average cashback per submission", "#E74C3C"),
+    ]
+    if unique_users is not None:
+        cards.append(Card("Unique Users", f"{unique_users:,}", "Distinct submitters", "#9B59B6"))
+    if 'avg_processing_days' in kpis:
+        cards.append(Card("Avg Processing Time", f"{kpis['avg_processing_days']:.1f} days", "From campaign start", "#34495E"))
+    if 'most_popular_campaign' in kpis:
+        cards.append(Card("Most Popular Campaign", str(kpis['most_popular_campaign']), "By submissions", "#16A085"))
+
+    # Ages are embedded as counts per age, not one value per submission, and
+    # per-timestamp submission counts are rolled up per day
+    aggregates = dict(results, unique_users=unique_users)
+    if 'ages' in results:
+        aggregates['ages'] = results['ages']['age'].value_counts().sort_index()
+    if 'submissions_over_time' in results:
+        aggregates['submissions_over_time'] = (
+            results['submissions_over_time']
+            .groupby(pd.Grouper(key='createdAt_challengesubmissions', freq='D'))['count'].sum()
+            .reset_index()
+        )
+
+    blocks = []
+    if 'submissions_over_time' in results:
+        blocks.append(Block("📅 Submissions Over Time", px.line(
+            aggregates['submissions_over_time'], x='createdAt_challengesubmissions', y='count', title='Submissions per Day')))
+    if 'campaign_performance' in results:
+        blocks.append(Block("🏆 Campaign Performance", px.bar(
+            results['campaign_performance'], x='Campaign', y=['Submissions', 'Total Cashback'], title='Campaign Performance')))
+    if 'geo_distribution' in results:
+        geo_distribution = results['geo_distribution'].set_index('Wilaya')['Count']
+        if geojson is not None:
+            blocks.append(Block("🌍 Geographical Distribution of Submissions by Wilaya", wilaya_choropleth(
+                geo_distribution, geojson, 'Submissions by Wilaya', 'Number of Submissions')))
+        blocks.append(Block("🗺️ Geographical Distribution", px.bar(
+            results['geo_distribution'], x='Wilaya', y='Count', title='Submission Distribution by Wilaya')))
+    if 'user_type_distribution' in results:
+        blocks.append(Block("👥 User Type Distribution", px.pie(
+            results['user_type_distribution'], values='Count', names='User Type', title='User Type Distribution')))
+    if 'status_distribution' in results:
+        blocks.append(Block("✅ Submission Status Distribution", px.pie(
+            results['status_distribution'], values='Count', names='Status', title='Submission Status Distribution')))
+    if 'top_users' in results:
+        blocks.append(Block("🏆 Top Users Performance", results['top_users'][['Full Name', 'Submission Count', 'Total Cashback']]))
+    if 'claims_over_time' in results:
+        blocks.append(Block("📈 Claims Over Time", px.line(
+            results['claims_over_time'], x='createdAt_challengesubmissions', y='count', title="Number of Claims per Day")))
+    if 'ages' in results:
+        ages = aggregates['ages']
+        blocks.append(Block("👥 Age Distribution", px.histogram(
+            x=ages.index, y=ages.values, histfunc='sum', nbins=20, labels={'x': 'age', 'y': 'count'}, title="Age Distribution of Users")))
+    if 'gender_distribution' in results:
+        gender_dist = results['gender_distribution']
+        blocks.append(Block("👥 Gender Distribution", px.pie(values=gender_dist.values, names=gender_dist.index, title="Gender Distribution")))
+    if 'wilaya_distribution' in results:
+        wilaya_dist = results['wilaya_distribution']
+        blocks.append(Block("🗺️ Distribution by Wilaya", px.bar(x=wilaya_dist.index, y=wilaya_dist.values, title="User Distribution by Wilaya")))
+    if 'country_distribution' in results:
+        country_dist = results['country_distribution']
+        blocks.append(Block("🌍 Distribution by Country", px.pie(values=country_dist.values, names=country_dist.index, title="User Distribution by Country")))
+    if 'tag_analysis' in results:
+        tag_performance = results['tag_analysis']['tag_performance']
+        blocks.append(Block("🏷️ Most Common Tags", px.bar(
+            results['tag_analysis']['top_tags'], x='Tag', y='Count', title="Top 10 Most Common Tags")))
+        fig = px.scatter(tag_performance, x='Submission Count', y='Avg Cashback', text='Tag',
+                         title="Tag Performance: Average Cashback vs Submission Count",
+                         labels={'Submission Count': 'Number of Submissions', 'Avg Cashback': 'Average Cashback Amount'})
+        fig.update_traces(textposition='top center')
+        blocks.append(Block("🏷️ Performance of Promotions by Tag", fig))
+        blocks.append(Block("🏷️ Tag Performance Table", tag_performance))
+
+    return render_report(title, cards, blocks, aggregates, subtitle)
+
+# -----------------------------
+# Product Report (app7.py)
+# -----------------------------
+
+def product_report(b, produit, geojson=None):
+    """
+    Render the product view of app7.py as a static HTML report.
+
+    Parameters:
+        b (dict): The product's breakdowns, from `precompute_breakdowns`.
+        produit (str): Product name (or `ALL_PRODUCTS`).
+        geojson (dict): Wilaya boundaries for the choropleth; the map is left
+            out when None.
+
+    Returns:
+        str: The HTML document.
+    """
+    cards = []
+    if 'genre_counts' in b:
+        cards.append(Card("Soumissions", f"{int(b['genre_counts'].sum()):,}", "Nombre total de soumissions", "#1ABC9C"))
+    if 'wilaya_counts' in b:
+        cards.append(Card("Wilayas", f"{len(b['wilaya_counts'])}", "Wilayas avec au moins une soumission", "#F39C12"))
+    if 'age_counts' in b and b['age_counts'].sum():
+        age_counts = b['age_counts']
+        mean_age = (age_counts.index.to_numpy() * age_counts.to_numpy()).sum() / age_counts.sum()
+        cards.append(Card("Âge moyen", f"{mean_age:.1f} ans", "Des participants", "#3498DB"))
+    if 'status_counts' in b and len(b['status_counts']):
+        cards.append(Card("Statut principal", str(b['status_counts'].idxmax()), "Statut le plus fréquent", "#E74C3C"))
+
+    # Breakdowns with no rows for this product have nothing to chart
+    charted = {name: values for name, values in b.items() if len(values)}
+    blocks = []
+    if 'genre_counts' in charted:
+        blocks.append(Block("1. Répartition par Genre", _bar(b['genre_counts'], 'Genre', 'Nombre', f"Répartition par Genre pour {produit}")))
+    if 'wilaya_counts' in charted:
+        wilaya_counts = b['wilaya_counts']
+        if geojson is not None:
+            blocks.append(Block("2. Carte des soumissions par Wilaya", wilaya_choropleth(
+                wilaya_counts, geojson, f"Soumissions par Wilaya pour {produit}", 'Nombre de soumissions')))
+        fig = _bar(wilaya_counts, 'Wilaya', 'Nombre', f"Répartition géographique par Wilaya pour {produit}")
+        fig.update_layout(xaxis_tickangle=-90)
+        blocks.append(Block("2. Répartition géographique par Wilaya", fig))
+    if 'age_counts' in charted:
+        age_counts = b['age_counts']
+        blocks.append(Block("4. Distribution par tranche d'âge", px.histogram(
+            x=age_counts.index, y=age_counts.values, histfunc='sum', nbins=10, title=f"Distribution d'âge pour {produit}",
+            labels={'x': 'Âge', 'y': 'Nombre de personnes'}, color_discrete_sequence=ORANGE)))
+    if 'status_counts' in charted:
+        blocks.append(Block("6. Statut des soumissions", _bar(b['status_counts'], 'Statut', 'Nombre', f"Statut des soumissions pour {produit}")))
+    if 'wilaya_genre' in charted:
+        wilaya_genre = b['wilaya_genre']
+        heatmap_fig = go.Figure(data=go.Heatmap(z=wilaya_genre.values, x=wilaya_genre.columns, y=wilaya_genre.index, colorscale='Oranges'))
+        heatmap_fig.update_layout(title=f"Proportion par région (Wilaya) et genre pour {produit}", xaxis_title="Genre", yaxis_title="Wilaya")
+        blocks.append(Block("8. Proportion par région (Wilaya) et genre", heatmap_fig))
+    if 'segment_counts' in charted:
+        blocks.append(Block("10. Répartition par segment", _bar(b['segment_counts'], 'Segment', 'Nombre', f"Répartition par segment pour {produit}")))
+    if 'store_counts' in charted:
+        fig = _bar(b['store_counts'], 'Magasin', 'Nombre', f"Répartition des magasins pour {produit}")
+        fig.update_layout(xaxis_tickangle=-90)
+        blocks.append(Block("11. Répartition des magasins", fig))
+    if 'tag_counts' in charted:
+        fig = _bar(b['tag_counts'], 'Tag', 'Nombre', f"Analyse des tags pour {produit}")
+        fig.update_layout(xaxis_tickangle=-90)
+        blocks.append(Block("12. Analyse des tags", fig))
+    if 'wilaya_cashback' in charted:
+        blocks.append(Block("13. Moyenne des montants de cashback par Wilaya", _bar(
+            b['wilaya_cashback'], 'Wilaya', 'Montant moyen de Cashback', f"Moyenne des montants de Cashback par Wilaya pour {produit}")))
+    if 'submissions_over_time' in charted:
+        submissions_over_time = b['submissions_over_time']
+        blocks.append(Block("15. Nombre de soumissions dans le temps", px.line(
+            submissions_over_time, x=submissions_over_time.index, y=submissions_over_time.values,
+            labels={'x': 'Date', 'y': 'Nombre de soumissions'}, title=f"Nombre de soumissions dans le temps pour {produit}")))
+    if 'usertype_counts' in charted:
+        blocks.append(Block("Submissions par type d'utilisateur (B2C, B2B)", _bar(
+            b['usertype_counts'], "Type d'utilisateur", 'Nombre de soumissions', "Submissions par type d'utilisateur (B2C, B2B)")))
+    if 'wilaya_age' in charted:
+        blocks.append(Block("Âge moyen par Wilaya", _bar(b['wilaya_age'], 'Wilaya', 'Âge moyen', "Âge moyen par Wilaya")))
+    if 'day_of_week_counts' in charted:
+        blocks.append(Block("Soumissions par jour de la semaine", _bar(
+            b['day_of_week_counts'], 'Jour de la semaine', 'Nombre de soumissions', "Soumissions par jour de la semaine")))
+    if 'wilaya_counts' in charted:
+        top_wilayas = b['wilaya_counts'].nlargest(10)
+        blocks.append(Block("Top 10 Wilayas par nombre de soumissions", px.bar(
+            top_wilayas, x=top_wilayas.values, y=top_wilayas.index, labels={'x': 'Nombre de soumissions', 'y': 'Wilaya'},
+            orientation='h', title="Top 10 Wilayas par nombre de soumissions", color_discrete_sequence=ORANGE)))
+
+    return render_report(f"Analyse des soumissions — {produit}", cards, blocks, b)
+
+# -----------------------------
+# Batch Export
+# -----------------------------
+
+def load_submissions(path):
+    """
+    Read an export the way app7.py does: schema columns and dtypes, explicit
+    date formats, and rows missing an essential column dropped (before the
+    dates are parsed, see `read_submissions`).
+    """
+    data, _ = read_submissions(path)
+    return data
+
+
+def export_product_reports(data, out_dir, geojson=None):
+    """
+    Write one report per product, plus the all-products one.
+
+    Breakdowns are computed once for all products (see
+    `precompute_breakdowns`); each report only renders its product's share.
+
+    Parameters:
+        data (DataFrame): Cleaned submissions.
+        out_dir (str or Path): Output directory, created if needed.
+        geojson (dict): Wilaya boundaries for the choropleths.
+
+    Returns:
+        list: Paths of the written reports.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for produit, b in precompute_breakdowns(data).items():
+        path = out_dir / report_filename(produit)
+        # Distinct products can share a file name once accents are dropped
+        suffix = 2
+        while path in paths:
+            path = out_dir / report_filename(f"{produit} {suffix}")
+            suffix += 1
+        path.write_text(product_report(b, produit, geojson), encoding='utf-8')
+        paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a static HTML report per product from a submissions export.")
+    parser.add_argument('csv', help="Submissions export (CSV)")
+    parser.add_argument('--out', default='reports', help="Output directory (default: reports)")
+    parser.add_argument('--geojson', default=WILAYAS_GEOJSON, help=f"Wilaya boundaries (default: {WILAYAS_GEOJSON})")
+    args = parser.parse_args(argv)
+
+    geojson = load_geojson(args.geojson)
+    if geojson is None:
+        print(f"{args.geojson} not found: reports are written without the Wilaya map.")
+    paths = export_product_reports(load_submissions(args.csv), args.out, geojson)
+    print(f"Wrote {len(paths)} reports to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# schema.py
+
+from typing import NamedTuple
+
+from dates import DateParser
+
+# -----------------------------
+# Submissions Export Schema
+# -----------------------------
+
+class Column(NamedTuple):
+    """
+    A column of the submissions export.
+
+    Attributes:
+        name (str): Column name in the export.
+        dtype (str): pandas dtype to parse the column with, or None for date
+            columns (read as text, then converted by `date_parser`).
+        date_format (str): Expected `pd.to_datetime` format for date columns,
+            or None to detect it from the data.
+    """
+    name: str
+    dtype: str = None
+    date_format: str = None
+
+
+TEXT = 'string[pyarrow]'
+
+SUBMISSIONS_SCHEMA = (
+    # Submission
+    Column('submission.$oid', TEXT),
+    Column('createdAt_challengesubmissions', date_format='ISO8601'),
+    Column('status_challengeticketsubmissions', TEXT),
+    Column('status_challengesubmissions', TEXT),
+    Column('Montant Cashback', 'float64'),
+    Column('tags', TEXT),
+    Column('storeName', TEXT),
+    # Campaign
+    Column('title.fr', TEXT),
+    Column('startDate_challenge', date_format='ISO8601'),
+    Column('endDate_challenge', date_format='ISO8601'),
+    Column('segment', TEXT),
+    # User
+    Column('submittedBy.id', TEXT),
+    Column('Prenom', TEXT),
+    Column('Nom', TEXT),
+    Column('Genre', TEXT),
+    Column('Date de naissance'),
+    Column('Date de création_user'),
+    Column('userType', TEXT),
+    Column('Wilaya', TEXT),
+    Column('commune', TEXT),
+    Column('country', TEXT),
+)
+
+SCHEMA_BY_NAME = {column.name: column for column in SUBMISSIONS_SCHEMA}
+DATE_COLUMNS = [column.name for column in SUBMISSIONS_SCHEMA if column.dtype is None]
+
+
+def columns_for(sections, core=()):
+    """
+    List the columns needed by a dashboard.
+
+    Parameters:
+        sections (list): `Section` definitions whose columns are needed.
+        core (list): Columns the dashboard needs outside of its sections.
+
+    Returns:
+        list: Column names, in schema order.
+    """
+    names = set(core)
+    for section in sections:
+        names.update(section.columns)
+    return [column.name for column in SUBMISSIONS_SCHEMA if column.name in names]
+
+
+def read_options(columns):
+    """
+    Build `pd.read_csv` / `pd.read_excel` options reading only `columns`,
+    with the schema's explicit dtypes instead of inference.
+
+    Columns absent from the export are simply not read; use
+    `missing_columns` to check the ones a dashboard cannot do without.
+
+    Parameters:
+        columns (list): Column names to read.
+
+    Returns:
+        dict: `usecols` and `dtype` keyword arguments.
+    """
+    wanted = set(columns)
+    dtypes = {
+        name: SCHEMA_BY_NAME[name].dtype
+        for name in wanted
+        if name in SCHEMA_BY_NAME and SCHEMA_BY_NAME[name].dtype is not None
+    }
+    return {'usecols': lambda name: name in wanted, 'dtype': dtypes}
+
+
+def date_parser():
+    """
+    Build a parser converting the schema's date columns of one export.
+
+    Declared formats are tried first; columns without one (or whose declared
+    format does not fit the export) get a format detected from a sample,
+    kept by the parser for the export's later chunks. Use a new parser for
+    each export.
+
+    Returns:
+        DateParser: Callable converting a DataFrame's date columns in place.
+    """
+    return DateParser({name: SCHEMA_BY_NAME[name].date_format for name in DATE_COLUMNS})
+
+
+def missing_columns(df, columns):
+    """Return the names in `columns` that `df` does not have."""
+    return [name for name in columns if name not in df.columns]
@@ -0,0 +1,385 @@
+# sections.py
+
+import os
+import re
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import NamedTuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from preview import WEIGHT_COLUMN
+
+# -----------------------------
+# Section Scheduler
+# -----------------------------
+
+class Section(NamedTuple):
+    """
+    An independent dashboard computation.
+
+    Attributes:
+        key (str): Name the result is stored under.
+        compute (callable): Function of a DataFrame returning the section's
+            aggregate. It must treat the DataFrame as read-only.
+        columns (tuple): Columns the computation needs; the section is skipped
+            when any of them is missing from its input.
+        source (str): Name of the input DataFrame the section reads.
+    """
+    key: str
+    compute: object
+    columns: tuple = ()
+    source: str = 'data'
+
+
+def _default_workers():
+    return min(8, (os.cpu_count() or 1) + 4)
+
+
+def run_sections(sections, inputs, max_workers=None):
+    """
+    Compute independent sections concurrently on a thread pool.
+
+    All sections share the same read-only inputs (threads avoid copying the
+    DataFrames, and pandas releases the GIL in most of its groupby and
+    hashing kernels), so the total latency approaches that of the slowest
+    section instead of the sum of all of them.
+
+    Parameters:
+        sections (list): `Section` definitions, in display order.
+        inputs (DataFrame or dict): The shared input, or a mapping of input
+            names to DataFrames for sections reading different frames.
+        max_workers (int): Size of the worker pool.
+
+    Returns:
+        OrderedDict: Section results keyed by section key, in the order of
+        `sections`. Sections with missing columns are left out.
+    """
+    if isinstance(inputs, pd.DataFrame):
+        inputs = {'data': inputs}
+
+    runnable = [
+        section for section in sections
+        if all(col in inputs[section.source].columns for col in section.columns)
+    ]
+    results = OrderedDict()
+    if not runnable:
+        return results
+
+    with ThreadPoolExecutor(max_workers=max_workers or _default_workers(), thread_name_prefix="section") as executor:
+        futures = [(section.key, executor.submit(section.compute, inputs[section.source])) for section in runnable]
+        for key, future in futures:
+            results[key] = future.result()
+    return results
+
+# -----------------------------
+# Section Computations
+# -----------------------------
+
+# Columns read by each computation, used to project the export at load time
+# and to skip sections whose columns are missing.
+KPI_COLUMNS = ('status_challengeticketsubmissions', 'Montant Cashback')
+KPI_OPTIONAL_COLUMNS = ('createdAt_challengesubmissions', 'startDate_challenge', 'title.fr')
+TIME_COLUMNS = ('createdAt_challengesubmissions',)
+CAMPAIGN_PERFORMANCE_COLUMNS = ('title.fr', 'submission.$oid', 'Montant Cashback')
+TOP_USERS_COLUMNS = ('submittedBy.id', 'Prenom', 'Nom', 'submission.$oid', 'Montant Cashback')
+CLAIMS_COLUMNS = ('status_challengesubmissions', 'createdAt_challengesubmissions')
+TAG_COLUMNS = ('tags', 'Montant Cashback')
+
+# The computations also accept a weighted sample (see
+# `preview.stratified_sample`): counts and sums are then weighted, so every
+# result estimates the population's figures.
+
+def _weights(df):
+    return df[WEIGHT_COLUMN] if WEIGHT_COLUMN in df.columns else None
+
+
+def _total(df):
+    weights = _weights(df)
+    return len(df) if weights is None else int(round(weights.sum()))
+
+
+def _sum(values, weights):
+    if weights is None:
+        return values.sum()
+    if pd.api.types.is_bool_dtype(values):
+        return weights[values.fillna(False).astype(bool)].sum()
+    return (values * weights).sum()
+
+
+def _mean(values, weights):
+    if weights is None:
+        return values.mean()
+    if pd.api.types.is_timedelta64_dtype(values):
+        # Summed in seconds: weighted nanosecond sums overflow
+        return pd.to_timedelta(_mean(values.dt.total_seconds(), weights), unit='s')
+    return _sum(values, weights) / weights[values.notna()].sum()
+
+
+def _size(df, by):
+    # Rows per group, or their summed weights (rounded) on a weighted sample
+    if _weights(df) is None:
+        return df.groupby(by).size()
+    return df.groupby(by)[WEIGHT_COLUMN].sum().round().astype('int64')
+
+
+def _value_counts(df, column):
+    if _weights(df) is None:
+        return df[column].value_counts()
+    return _size(df, column).sort_values(ascending=False).rename('count')
+
+
+def _count_and_sum(df, by, counted, summed):
+    # groupby(by).agg({counted: 'count', summed: 'sum'}), weighted if needed
+    weights = _weights(df)
+    if weights is None:
+        return df.groupby(by).agg({counted: 'count', summed: 'sum'})
+    weighted = df[by].assign(**{counted: weights.where(df[counted].notna(), 0), summed: df[summed] * weights})
+    aggregated = weighted.groupby(by).sum()
+    aggregated[counted] = aggregated[counted].round().astype('int64')
+    return aggregated
+
+
+def compute_kpis(df):
+    """
+    Compute the headline KPI values.
+
+    Distinct counts (unique users, Wilayas) are not included: they come from
+    the mergeable sketches in `sketches.py`.
+
+    Parameters:
+        df (DataFrame): Submissions to summarize.
+
+    Returns:
+        dict: KPI values by name.
+    """
+    weights = _weights(df)
+    # Missing statuses count as not approved (Arrow strings compare as <NA>)
+    approved = df['status_challengeticketsubmissions'].eq('APPROVED').fillna(False)
+    kpis = {
+        'total_submissions': _total(df),
+        'approval_rate': _mean(approved, weights),
+        'total_cashback': _sum(df['Montant Cashback'], weights),
+        'avg_cashback': _mean(df['Montant Cashback'], weights),
+        'conversion_rate': _sum(approved, weights) / _total(df),
+    }
+    if 'startDate_challenge' in df.columns and 'createdAt_challengesubmissions' in df.columns:
+        kpis['avg_processing_days'] = _mean(df['createdAt_challengesubmissions'] - df['startDate_challenge'], weights).days
+    if 'title.fr' in df.columns:
+        kpis['most_popular_campaign'] = df['title.fr'].mode().iloc[0] if weights is None else _value_counts(df, 'title.fr').index[0]
+    return kpis
+
+
+class RunningKpis:
+    """
+    KPI totals and daily submission counts accumulated chunk by chunk.
+
+    Used for the partial results shown while a file loads: each new chunk is
+    folded into running totals, so refreshing the partial view never
+    re-concatenates or rescans the rows loaded before.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.approved = 0
+        self.cashback_sum = 0.0
+        self.cashback_count = 0
+        self.users = set()
+        self.campaigns = Counter()
+        self.daily = Counter()
+
+    def update(self, chunk):
+        """Fold one parsed chunk into the totals (skipped if it lacks the KPI columns)."""
+        if not all(col in chunk.columns for col in KPI_COLUMNS):
+            return
+        self.rows += len(chunk)
+        self.approved += int(chunk['status_challengeticketsubmissions'].eq('APPROVED').fillna(False).sum())
+        self.cashback_sum += float(chunk['Montant Cashback'].sum())
+        self.cashback_count += int(chunk['Montant Cashback'].count())
+        if 'submittedBy.id' in chunk.columns:
+            self.users.update(chunk['submittedBy.id'].dropna().unique())
+        if 'title.fr' in chunk.columns:
+            self.campaigns.update(chunk['title.fr'].value_counts().to_dict())
+        if 'createdAt_challengesubmissions' in chunk.columns:
+            self.daily.update(chunk['createdAt_challengesubmissions'].dt.floor('D').value_counts().to_dict())
+
+    def kpis(self):
+        """
+        Returns:
+            dict: The same KPI names as `compute_kpis`, plus `unique_users`.
+        """
+        kpis = {
+            'total_submissions': self.rows,
+            'approval_rate': self.approved / self.rows if self.rows else 0.0,
+            'total_cashback': self.cashback_sum,
+            'avg_cashback': self.cashback_sum / self.cashback_count if self.cashback_count else 0.0,
+            'conversion_rate': self.approved / self.rows if self.rows else 0.0,
+            'unique_users': len(self.users),
+        }
+        if self.campaigns:
+            kpis['most_popular_campaign'] = self.campaigns.most_common(1)[0][0]
+        return kpis
+
+    def submissions_over_time(self):
+        """
+        Returns:
+            DataFrame: Submissions per day, in the layout of
+            `compute_submissions_over_time`.
+        """
+        daily = pd.Series(self.daily, dtype='int64').sort_index()
+        return daily.rename_axis('createdAt_challengesubmissions').reset_index(name='count')
+
+
+def compute_submissions_over_time(df):
+    return _size(df, 'createdAt_challengesubmissions').reset_index(name='count')
+
+
+def compute_campaign_performance(df):
+    campaign_performance = _count_and_sum(df, ['title.fr'], 'submission.$oid', 'Montant Cashback').reset_index()
+    campaign_performance.columns = ['Campaign', 'Submissions', 'Total Cashback']
+    return campaign_performance
+
+
+def value_counts_frame(column, label):
+    """
+    Build a computation returning `column`'s value counts as a two-column frame.
+
+    Parameters:
+        column (str): Column to count.
+        label (str): Display name of the category column.
+
+    Returns:
+        callable: Function of a DataFrame returning a `[label, 'Count']` frame.
+    """
+    def compute(df):
+        counts = _value_counts(df, column).reset_index()
+        counts.columns = [label, 'Count']
+        return counts
+    return compute
+
+
+def value_counts_series(column):
+    """Build a computation returning `column`'s value counts as a Series."""
+    def compute(df):
+        return _value_counts(df, column)
+    return compute
+
+
+def compute_top_users(df, n=10):
+    top_users = _count_and_sum(df, ['submittedBy.id', 'Prenom', 'Nom'], 'submission.$oid', 'Montant Cashback').reset_index()
+    top_users.columns = ['User ID', 'First Name', 'Last Name', 'Submission Count', 'Total Cashback']
+    top_users['Full Name'] = top_users['First Name'] + ' ' + top_users['Last Name']
+    top_users = top_users.sort_values('Submission Count', ascending=False).head(n)
+    return top_users
+
+
+def compute_claims_over_time(df):
+    claimed = df[df['status_challengesubmissions'].eq('claimed').fillna(False)]
+    return _size(claimed, pd.Grouper(key='createdAt_challengesubmissions', freq='D')).reset_index(name='count')
+
+
+def compute_ages(df):
+    """
+    Compute each row's age in years from `Date de naissance`.
+
+    Returns:
+        DataFrame: An `age` column aligned with `df` (plus the row weights
+        of a weighted sample).
+    """
+    born = df['Date de naissance']
+    today = datetime.now()
+    birthday_ahead = (born.dt.month > today.month) | ((born.dt.month == today.month) & (born.dt.day > today.day))
+    age = today.year - born.dt.year - birthday_ahead.astype(int)
+    ages = age.to_frame('age')
+    if WEIGHT_COLUMN in df.columns:
+        ages[WEIGHT_COLUMN] = df[WEIGHT_COLUMN]
+    return ages
+
+
+def normalize_tag(tag):
+    # Convert to lowercase
+    tag = tag.lower()
+    # Remove leading/trailing whitespace
+    tag = tag.strip()
+    # Remove special characters and replace spaces with underscores
+    tag = re.sub(r'[^\w\s-]', '', tag)
+    tag = re.sub(r'[-\s]+', '_', tag)
+    return tag
+
+
+def normalize_tags(tags):
+    """
+    Vectorized `normalize_tag` over a Series of tags.
+
+    Runs on Arrow strings, so the work happens in compiled kernels (which
+    release the GIL) instead of a Python call per tag. `\\w` is spelled as
+    Unicode letters, digits and underscore to match Python's `re`.
+
+    Parameters:
+        tags (Series): Raw tags, one per row.
+
+    Returns:
+        Series: Normalized tags, same index.
+    """
+    tags = tags.astype('string[pyarrow]').str.lower().str.strip()
+    tags = tags.str.replace(r'[^\pL\pN_\s-]', '', regex=True)
+    return tags.str.replace(r'[-\s]+', '_', regex=True)
+
+
+def split_tags(tags):
+    """
+    Split comma-separated tags into one row per tag, with Arrow kernels.
+
+    Parameters:
+        tags (Series): Comma-separated tags; missing values yield no row.
+
+    Returns:
+        Series: One tag per row, indexed like the row it comes from.
+    """
+    lists = pc.split_pattern(pa.array(tags.astype('string[pyarrow]'), type=pa.string()), ',')
+    parents = pc.list_parent_indices(lists).to_numpy()
+    return pd.Series(pd.arrays.ArrowStringArray(pc.list_flatten(lists)), index=tags.index[parents])
+
+
+def compute_tag_analysis(df):
+    """
+    Compute the most common tags and the cashback performance of each tag.
+
+    Tags are split to one row per tag and normalized with vectorized Arrow
+    string kernels, which release the GIL, so this section overlaps with the
+    others in `run_sections`.
+
+    Returns:
+        dict: `top_tags` (10 most common tags) and `tag_performance`
+        (average cashback and submission count per tag).
+    """
+    tags = normalize_tags(split_tags(df['tags']))
+    tagged = pd.DataFrame({'tags': tags, 'Montant Cashback': df['Montant Cashback'].loc[tags.index]})
+    weights = _weights(df)
+    if weights is not None:
+        tagged[WEIGHT_COLUMN] = weights.loc[tags.index]
+
+    # Most common tags
+    top_tags = _value_counts(tagged, 'tags').head(10).rename_axis('Tag').reset_index(name='Count')
+    top_tags = top_tags.astype({'Tag': object, 'Count': 'int64'})
+
+    # Average cashback for each tag
+    if weights is None:
+        tag_performance = tagged.groupby('tags')['Montant Cashback'].agg(['mean', 'count']).reset_index()
+    else:
+        weighted = tagged.assign(**{
+            'Montant Cashback': tagged['Montant Cashback'] * tagged[WEIGHT_COLUMN],
+            WEIGHT_COLUMN: tagged[WEIGHT_COLUMN].where(tagged['Montant Cashback'].notna(), 0),
+        }).groupby('tags')[['Montant Cashback', WEIGHT_COLUMN]].sum()
+        tag_performance = pd.DataFrame({
+            'mean': weighted['Montant Cashback'] / weighted[WEIGHT_COLUMN],
+            'count': weighted[WEIGHT_COLUMN].round().astype('int64'),
+        }).reset_index()
+    tag_performance.columns = ['Tag', 'Avg Cashback', 'Submission Count']
+    tag_performance = tag_performance.astype({'Tag': object, 'Submission Count': 'int64'})
+    tag_performance = tag_performance.sort_values('Avg Cashback', ascending=False)
+
+    return {'top_tags': top_tags, 'tag_performance': tag_performance}
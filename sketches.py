@@ -0,0 +1,256 @@
+# sketches.py
+
+import numpy as np
+import pandas as pd
+
+# -----------------------------
+# Mergeable Distinct Counts
+# -----------------------------
+
+PRECISION = 14            # 2**14 HyperLogLog registers, ~0.8% standard error
+EXACT_THRESHOLD = 10_000  # below this estimate, counts are computed exactly
+
+
+def hash_values(values):
+    """Hash values to uint64 (identical values always get the same hash)."""
+    return pd.util.hash_pandas_object(values, index=False).to_numpy()
+
+
+def _bit_length(x):
+    # Vectorized int.bit_length() for uint64 arrays.
+    x = x.copy()
+    length = np.zeros(len(x), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = x >= (np.uint64(1) << np.uint64(shift))
+        length[high] += shift
+        x[high] >>= np.uint64(shift)
+    return length + (x > 0)
+
+
+def hll_positions(hashes, precision=PRECISION):
+    """
+    Split hashes into HyperLogLog register indices and ranks.
+
+    Returns:
+        tuple: `(index, rank)` arrays; the rank is the position of the
+        leftmost 1-bit in the bits following the register index.
+    """
+    width = 64 - precision
+    index = (hashes >> np.uint64(width)).astype(np.int64)
+    rest = hashes & np.uint64((1 << width) - 1)
+    rank = (width + 1 - _bit_length(rest)).astype(np.uint8)
+    return index, rank
+
+
+# 2**-rank for every possible register value
+_INVERSE_POWERS = np.power(2.0, -np.arange(65, dtype=np.float64))
+
+
+def hll_estimate(registers):
+    """
+    Estimate distinct counts from dense HyperLogLog registers.
+
+    Parameters:
+        registers (ndarray): One row of `2**precision` registers per count.
+
+    Returns:
+        ndarray: One estimate per row.
+    """
+    registers = np.atleast_2d(registers)
+    m = registers.shape[1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / _INVERSE_POWERS[registers].sum(axis=1)
+    zeros = (registers == 0).sum(axis=1)
+    # Small-range correction (linear counting)
+    with np.errstate(divide='ignore'):
+        linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+class DistinctCube:
+    """
+    Distinct counts of one column, stored per group and mergeable across groups.
+
+    Each group (e.g. day x campaign) keeps a sparse HyperLogLog sketch: its
+    non-empty registers only. Counting over any set of groups (a date range,
+    one campaign...) merges the selected sketches with a vectorized max,
+    without rebuilding a hash set of the underlying values. Counts whose
+    estimate falls below `exact_threshold` are recomputed exactly from the
+    stored value hashes.
+
+    Parameters:
+        df (DataFrame): Rows to count.
+        column (str): Column whose distinct values are counted.
+        by (list): Columns defining the groups.
+        precision (int): Number of register-index bits.
+        exact_threshold (int): Estimates below this are made exact.
+    """
+
+    def __init__(self, df, column, by, precision=PRECISION, exact_threshold=EXACT_THRESHOLD):
+        self.column = column
+        self.by = list(by)
+        self.precision = precision
+        self.exact_threshold = exact_threshold
+
+        # Rows with a missing key get their own group (with a null key), so
+        # unfiltered counts include them like `nunique()` does
+        df = df[df[column].notna()]
+        grouped = df.groupby(self.by, sort=True, observed=True, dropna=False)
+        group = grouped.ngroup().to_numpy()
+        self.keys = grouped.size().index.to_frame(index=False)
+
+        pairs = pd.DataFrame({'group': group, 'hash': hash_values(df[column])}).drop_duplicates()
+        self._hash_group = pairs['group'].to_numpy()
+        self._hashes = pairs['hash'].to_numpy()
+
+        index, rank = hll_positions(self._hashes, precision)
+        sparse = (
+            pd.DataFrame({'group': self._hash_group, 'index': index, 'rank': rank})
+            .groupby(['group', 'index'], sort=False)['rank'].max()
+            .reset_index()
+        )
+        # Registers are kept sorted by index, largest rank first, and hashes
+        # sorted by value: a merge then keeps the first entry of each run of
+        # the selected ones, instead of an unbuffered `np.maximum.at`.
+        order = np.lexsort((-sparse['rank'].to_numpy(np.int16), sparse['index'].to_numpy()))
+        self._reg_group = sparse['group'].to_numpy()[order]
+        self._reg_index = sparse['index'].to_numpy()[order]
+        self._reg_rank = sparse['rank'].to_numpy()[order]
+
+        order = np.argsort(self._hashes, kind='stable')
+        self._hash_group = self._hash_group[order]
+        self._hashes = self._hashes[order]
+
+        self._levels = {}
+
+    def _selected(self, groups, mask):
+        if mask is None:
+            return np.ones(len(groups), dtype=bool)
+        return np.asarray(mask, dtype=bool)[groups]
+
+    def _level(self, level):
+        # Registers and hashes re-sorted by `level` value first, built on first use
+        if level not in self._levels:
+            codes, labels = pd.factorize(self.keys[level])
+            m = 1 << self.precision
+
+            reg_code = codes[self._reg_group]
+            order = np.lexsort((-self._reg_rank.astype(np.int16), self._reg_index, reg_code))
+            order = order[reg_code[order] >= 0]
+            registers = (self._reg_group[order], reg_code[order] * m + self._reg_index[order], self._reg_rank[order])
+
+            hash_code = codes[self._hash_group]
+            order = np.lexsort((self._hashes, hash_code))
+            order = order[hash_code[order] >= 0]
+            hashes = (self._hash_group[order], hash_code[order], self._hashes[order])
+
+            self._levels[level] = (labels, registers, hashes)
+        return self._levels[level]
+
+    def count(self, mask=None):
+        """
+        Count distinct values over the groups selected by `mask`.
+
+        Parameters:
+            mask (array-like): Boolean selection aligned with `keys`; all
+                groups when None.
+
+        Returns:
+            int: The distinct count (exact below `exact_threshold`).
+        """
+        selected = self._selected(self._reg_group, mask)
+        index, rank = self._reg_index[selected], self._reg_rank[selected]
+        first = _run_starts(index)
+        registers = np.zeros(1 << self.precision, dtype=np.uint8)
+        registers[index[first]] = rank[first]
+        estimate = hll_estimate(registers)[0]
+        if estimate < self.exact_threshold:
+            return len(_run_starts(self._hashes[self._selected(self._hash_group, mask)]))
+        return int(round(estimate))
+
+    def count_by(self, level, mask=None):
+        """
+        Count distinct values per value of one of the `by` columns.
+
+        Parameters:
+            level (str): Grouping column to break the count down by.
+            mask (array-like): Boolean selection aligned with `keys`.
+
+        Returns:
+            Series: Distinct counts by `level` value, largest first. Groups
+            with a missing `level` value are left out, as in a groupby.
+        """
+        labels, (reg_group, cell, rank), (hash_group, hash_code, hashes) = self._level(level)
+        m = 1 << self.precision
+
+        selected = self._selected(reg_group, mask)
+        cell, rank = cell[selected], rank[selected]
+        first = _run_starts(cell)
+        registers = np.zeros(len(labels) * m, dtype=np.uint8)
+        registers[cell[first]] = rank[first]
+        counts = np.round(hll_estimate(registers.reshape(len(labels), m))).astype(np.int64)
+
+        # Small counts are recomputed exactly
+        small = counts < self.exact_threshold
+        if small.any():
+            selected = self._selected(hash_group, mask)
+            code, hashes = hash_code[selected], hashes[selected]
+            first = _run_starts(code, hashes)
+            counts[small] = np.bincount(code[first], minlength=len(labels))[small]
+
+        counts = pd.Series(counts, index=labels)
+        counts = counts[counts > 0]
+        counts.index.name = level
+        return counts.sort_values(ascending=False)
+
+
+def _run_starts(*keys):
+    # Positions starting a new run of equal values in sorted key arrays
+    if not len(keys[0]):
+        return np.empty(0, dtype=np.int64)
+    changed = np.zeros(len(keys[0]), dtype=bool)
+    changed[0] = True
+    for values in keys:
+        changed[1:] |= values[1:] != values[:-1]
+    return np.flatnonzero(changed)
+
+
+def daily_cubes(df, columns, date_column, by=()):
+    """
+    Build a `DistinctCube` per column, grouped by day and the `by` columns.
+
+    Parameters:
+        df (DataFrame): Rows to count.
+        columns (list): Columns to count distinct values of; absent ones are skipped.
+        date_column (str): Datetime column giving each row's day.
+        by (list): Extra grouping columns (e.g. campaign, Wilaya); absent ones
+            are skipped.
+
+    Returns:
+        dict: Cubes by column. Their `keys` hold a `day` column of dates.
+    """
+    keyed = df.assign(day=df[date_column].dt.date)
+    keys = ['day'] + [col for col in by if col in df.columns]
+    return {col: DistinctCube(keyed, col, keys) for col in columns if col in df.columns}
+
+
+def daily_mask(cube, start_date, end_date, values=None):
+    """
+    Select the groups of a `daily_cubes` cube in a date range.
+
+    Groups with a missing day or key value are never selected.
+
+    Parameters:
+        cube (DistinctCube): Cube built by `daily_cubes`.
+        start_date, end_date (date): Inclusive day range.
+        values (dict): Required value of some grouping columns.
+
+    Returns:
+        ndarray: Boolean mask aligned with `cube.keys`.
+    """
+    keys = cube.keys
+    mask = (keys['day'] >= start_date) & (keys['day'] <= end_date)
+    for col, value in (values or {}).items():
+        # Null keys compare as <NA> on Arrow strings; they are not selected
+        mask &= keys[col].eq(value).fillna(False)
+    return mask.to_numpy(dtype=bool, na_value=False)
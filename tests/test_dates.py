@@ -0,0 +1,44 @@
+import pandas as pd
+
+from dates import DateParser, parse_dates
+
+
+def test_formats_are_kept_per_parser():
+    iso = pd.DataFrame({'d': ['2024-03-01', '2024-03-15']})
+    french = pd.DataFrame({'d': ['01/03/2024', '15/03/2024']})
+
+    DateParser({'d': None})(iso)
+    parsed = DateParser({'d': None})(french)
+    assert list(parsed['d']) == [pd.Timestamp('2024-03-01'), pd.Timestamp('2024-03-15')]
+
+
+def test_given_format_is_redetected_when_a_chunk_fails():
+    _, _, fmt = parse_dates(pd.Series(['2024-03-01', '2024-03-15']))
+
+    parsed, failed, fmt = parse_dates(pd.Series(['01/03/2024', '15/03/2024', None]), fmt)
+    assert failed == 0
+    assert parsed.notna().sum() == 2
+
+    # The re-detected format is returned for the next chunks
+    parsed, failed, _ = parse_dates(pd.Series(['20/04/2024']), fmt)
+    assert failed == 0
+
+
+def test_chunks_get_the_same_dtype():
+    parser = DateParser({'d': 'ISO8601'})
+    chunks = [
+        parser(pd.DataFrame({'d': ['2024-03-01T10:00:00.000Z', '2024-03-02T23:30:00.000Z']})),
+        parser(pd.DataFrame({'d': [None, None]})),
+        parser(pd.DataFrame({'d': ['2024-03-03T12:00:00+01:00']})),
+    ]
+    merged = pd.concat(chunks, ignore_index=True)['d']
+    assert merged.dtype == 'datetime64[ns]'
+    assert merged.iloc[1] == pd.Timestamp('2024-03-02 23:30')
+    assert merged.iloc[4] == pd.Timestamp('2024-03-03 11:00')
+
+
+def test_date_parser_reports_failure_rates():
+    parser = DateParser({'d': None})
+    parser(pd.DataFrame({'d': ['2024-03-01', '2024-03-02', '2024-03-03', 'garbage']}))
+    parser(pd.DataFrame({'d': ['2024-03-04', None]}))
+    assert parser.failure_rates() == {'d': 1 / 5}
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from drilldown import OTHER_LABEL, DrilldownIndex, top_n_with_other
+from product_breakdowns import UNSPECIFIED, precompute_store_drilldown
+
+
+def _leaf_counts():
+    rng = np.random.default_rng(0)
+    rows = pd.DataFrame({
+        'Wilaya': rng.choice([f"w{i}" for i in range(30)], 5000),
+        'commune': rng.choice([f"c{i}" for i in range(40)], 5000),
+        'storeName': rng.choice([f"s{i}" for i in range(50)], 5000),
+    })
+    return rows.groupby(['Wilaya', 'commune', 'storeName']).size()
+
+
+def test_top_n_with_other_folds_the_tail():
+    counts = pd.Series({'a': 5, 'b': 3, 'c': 2, 'd': 1})
+    result = top_n_with_other(counts, n=2)
+    assert list(result.index) == ['a', 'b', OTHER_LABEL]
+    assert result.sum() == counts.sum()
+
+
+def test_children_are_bounded_and_sum_to_parent():
+    counts = _leaf_counts()
+    index = DrilldownIndex(counts, top_n=10)
+
+    root = index.children()
+    assert len(root) <= 11
+    assert root.sum() == counts.sum()
+
+    wilaya = root.index[0]
+    communes = index.children((wilaya,))
+    assert len(communes) <= 11
+    assert communes.sum() == counts.xs(wilaya, level='Wilaya').sum()
+    assert communes.index[-1] == OTHER_LABEL
+
+
+def test_can_drill_stops_at_other_and_leaves():
+    index = DrilldownIndex(_leaf_counts(), top_n=10)
+    assert index.can_drill((), 'w1')
+    assert not index.can_drill((), OTHER_LABEL)
+    assert not index.can_drill(('w1', 'c1'), 's1')
+    assert index.children(('w1', 'c1', 's1')).empty
+
+
+def test_store_drilldown_keeps_rows_with_missing_commune_or_store():
+    data = pd.DataFrame({
+        'title.fr': ['P1'] * 5 + ['P2'],
+        'Wilaya': ['Alger', 'Alger', 'Oran', 'Oran', 'Oran', 'Alger'],
+        'commune': ['Bab', None, 'Es Senia', 'Es Senia', None, 'Bab'],
+        'storeName': ['S1', 'S2', None, 'S3', 'S4', 'S1'],
+    })
+    drilldown = precompute_store_drilldown(data)
+
+    index, root = drilldown['P1']
+    wilayas = index.children(root)
+    assert wilayas.sum() == 5
+    assert wilayas['Oran'] == 3
+    assert index.children(root + ('Oran',))[UNSPECIFIED] == 1
+    assert index.children(root + ('Oran', 'Es Senia'))[UNSPECIFIED] == 1
@@ -0,0 +1,83 @@
+import time
+
+import pandas as pd
+
+from ingest import BackgroundLoader, get_loader
+from sections import RunningKpis
+
+
+class Upload:
+    # Stand-in for Streamlit's UploadedFile
+    def __init__(self, data, file_id, name="export.csv"):
+        self._data = data
+        self.file_id = file_id
+        self.name = name
+
+    def getvalue(self):
+        return self._data
+
+
+def _csv(rows, last_name="Ali"):
+    lines = ["status_challengeticketsubmissions,Montant Cashback,Nom"]
+    lines += [f"APPROVED,{i},Ali" for i in range(rows - 1)]
+    lines.append(f"REJECTED,0,{last_name}")
+    return "\n".join(lines).encode('latin-1')
+
+
+def _slow(chunk):
+    time.sleep(0.002)
+    return chunk
+
+
+def _consume(loader):
+    # Fold chunks as app.py does, starting over when the loader restarts.
+    # Returns the largest partial row count seen.
+    attempt, running, largest = None, None, 0
+    while not loader.done:
+        chunk_attempt, chunks = loader.new_chunks()
+        if chunk_attempt != attempt:
+            attempt, running = chunk_attempt, RunningKpis()
+        for chunk in chunks:
+            running.update(chunk)
+        largest = max(largest, running.rows)
+        time.sleep(0.001)
+    return largest
+
+
+def test_loads_in_chunks_and_merges_once():
+    loader = BackgroundLoader(Upload(_csv(1000), 'a'), postprocess=_slow, chunk_rows=100).start()
+    assert 0 < _consume(loader) <= 1000
+    df = loader.result()
+    assert len(df) == 1000 and list(df.index) == list(range(1000))
+    assert loader.encoding == 'utf-8'
+
+
+def test_encoding_restart_resets_running_totals():
+    # The non-ASCII byte near the end only fails UTF-8 after most chunks
+    upload = Upload(_csv(1000, last_name="Zoé"), 'a')
+    loader = BackgroundLoader(upload, encodings=['utf-8', 'latin1'], postprocess=_slow, chunk_rows=50).start()
+    largest = _consume(loader)
+    assert loader.attempt == 1
+    assert loader.encoding == 'latin1'
+    assert 0 < largest <= 1000
+    assert loader.result()['Nom'].iloc[-1] == "Zoé"
+
+
+def test_reupload_of_same_content_reuses_the_loader():
+    state = {}
+    first = get_loader(state, Upload(_csv(100), 'upload-1'))
+    second = get_loader(state, Upload(_csv(100), 'upload-2'))
+    assert second is first
+
+
+def test_replaced_upload_is_cancelled():
+    state = {}
+    stale = get_loader(state, Upload(_csv(5000), 'upload-1'), postprocess=_slow, chunk_rows=10)
+    current = get_loader(state, Upload(_csv(50), 'upload-2'))
+    assert current is not stale
+    assert [key for key in state if key.startswith("ingest::")] == [current.key]
+
+    assert stale.result() is None
+    assert stale.error == "Loading was cancelled."
+    assert stale.rows_read < 5000
+    assert isinstance(current.result(), pd.DataFrame)
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+from preview import CONFIDENCE_Z, WEIGHT_COLUMN, relative_error, stratified_sample
+from product_breakdowns import ALL_PRODUCTS, precompute_breakdowns
+from sections import compute_campaign_performance, compute_kpis
+
+
+def _skewed(seed=0):
+    # One large campaign and a long tail of tiny ones, spread over Wilayas
+    rng = np.random.default_rng(seed)
+    campaigns = ['big'] * 100_000 + [f"tail{i}" for i in range(300) for _ in range(3)]
+    rows = pd.DataFrame({'title.fr': campaigns})
+    rows['Wilaya'] = rng.choice([f"w{i}" for i in range(20)], len(rows))
+    rows['Genre'] = rng.choice(['Homme', 'Femme'], len(rows))
+    rows['submission.$oid'] = np.arange(len(rows)).astype(str)
+    rows['Montant Cashback'] = rng.uniform(0, 100, len(rows))
+    rows['status_challengeticketsubmissions'] = rng.choice(['APPROVED', 'REJECTED'], len(rows))
+    return rows
+
+
+def test_weights_sum_to_stratum_sizes():
+    rows = _skewed()
+    sample = stratified_sample(rows)
+    strata = ['title.fr', 'Wilaya']
+    expected = rows.groupby(strata).size()
+    weighted = sample.groupby(strata)[WEIGHT_COLUMN].sum().reindex(expected.index)
+    np.testing.assert_allclose(weighted, expected)
+
+
+def test_weighted_counts_are_unbiased_for_large_and_tail_strata():
+    rows = _skewed()
+    sample = stratified_sample(rows)
+
+    exact = compute_campaign_performance(rows).set_index('Campaign')
+    estimate = compute_campaign_performance(sample).set_index('Campaign').reindex(exact.index)
+    assert abs(estimate.loc['big', 'Submissions'] / exact.loc['big', 'Submissions'] - 1) < 0.01
+    tail = exact.index != 'big'
+    assert abs(estimate.loc[tail, 'Submissions'].sum() / exact.loc[tail, 'Submissions'].sum() - 1) < 0.01
+    assert abs(estimate['Total Cashback'].sum() / exact['Total Cashback'].sum() - 1) < 0.03
+
+    kpis = compute_kpis(sample)
+    assert kpis['total_submissions'] == len(rows)
+    assert abs(kpis['approval_rate'] - compute_kpis(rows)['approval_rate']) < 0.01
+
+
+def test_weighted_breakdowns_estimate_the_full_dataset():
+    rows = _skewed()
+    exact = precompute_breakdowns(rows)[ALL_PRODUCTS]['genre_counts']
+    estimate = precompute_breakdowns(stratified_sample(rows))[ALL_PRODUCTS]['genre_counts'].reindex(exact.index)
+    assert ((estimate / exact - 1).abs() < 0.02).all()
+
+
+def test_relative_error_reduces_to_binomial_for_uniform_weights():
+    fraction = 0.05
+    weights = np.full(1000, 1 / fraction)
+    counts = np.array([2_000.0, 4_000.0, 6_000.0])
+    expected = CONFIDENCE_Z * np.sqrt((1 - fraction) / (4_000 * fraction))
+    assert np.isclose(relative_error(counts, weights), expected)
+
+
+def test_relative_error_grows_with_weight_spread():
+    uniform = np.full(1000, 20.0)
+    spread = np.concatenate([np.full(500, 1.0), np.full(500, 39.0)])
+    assert relative_error([4_000], spread) > relative_error([4_000], uniform)
@@ -0,0 +1,58 @@
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+from product_breakdowns import ALL_PRODUCTS, precompute_breakdowns
+from report import export_product_reports, product_report, render_report
+from schema import TEXT
+
+
+def _report_data(document):
+    match = re.search(r'<script type="application/json" id="report-data">(.*?)</script>', document, re.S)
+    return json.loads(match.group(1))
+
+
+def _submissions():
+    return pd.DataFrame({
+        'title.fr': pd.array(['Café', 'Cafe', 'Café', 'Thé'], dtype=TEXT),
+        'Wilaya': pd.array(['Alger', 'Oran', 'Alger', None], dtype=TEXT),
+        'Genre': pd.array(['Homme', None, 'Femme', 'Femme'], dtype=TEXT),
+        'status_challengeticketsubmissions': pd.array(['APPROVED', 'REJECTED', 'APPROVED', None], dtype=TEXT),
+    })
+
+
+def test_report_data_round_trips():
+    aggregates = {
+        'counts': pd.Series({'Alger': 2, 'Oran': 1}),
+        'table': pd.DataFrame({'Wilaya': ['Alger', 'Oran'], 'Mean': [1.5, np.nan]}),
+        'note': 'ends with </script>',
+    }
+    document = render_report("Rapport", [], [], aggregates)
+
+    data = _report_data(document)
+    assert data['note'] == aggregates['note']
+    assert pd.Series(data['counts']['data'], index=data['counts']['index']).equals(aggregates['counts'])
+    assert data['table']['columns'] == ['Wilaya', 'Mean']
+    assert data['table']['data'] == [['Alger', 1.5], ['Oran', None]]
+
+
+def test_product_report_embeds_its_breakdowns():
+    breakdowns = precompute_breakdowns(_submissions())['Café']
+    data = _report_data(product_report(breakdowns, 'Café'))
+    counts = data['wilaya_counts']
+    assert dict(zip(counts['index'], counts['data'])) == {'Alger': 2}
+
+
+def test_export_writes_one_report_per_product(tmp_path):
+    # "Cafe" has no Wilaya x Genre rows and "Thé" no Wilaya: their reports leave those charts out
+    paths = export_product_reports(_submissions(), tmp_path / 'reports')
+
+    names = sorted(path.name for path in paths)
+    assert names == ['rapport_cafe-2.html', 'rapport_cafe.html', 'rapport_the.html', 'rapport_tous-les-produits.html']
+    assert sorted(path.name for path in (tmp_path / 'reports').iterdir()) == names
+
+    # "Café" and "Cafe" share a slug: each keeps its own report
+    titles = {re.search(r'<title>.* — (.*?)</title>', path.read_text(encoding='utf-8')).group(1) for path in paths}
+    assert titles == {'Café', 'Cafe', 'Thé', ALL_PRODUCTS}
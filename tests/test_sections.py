@@ -0,0 +1,52 @@
+import time
+
+import pandas as pd
+
+from schema import TEXT
+from sections import RunningKpis, Section, compute_claims_over_time, compute_kpis, run_sections
+
+
+def _submissions():
+    return pd.DataFrame({
+        'status_challengeticketsubmissions': pd.array(['APPROVED', 'REJECTED', None], dtype=TEXT),
+        'status_challengesubmissions': pd.array(['claimed', None, 'pending'], dtype=TEXT),
+        'Montant Cashback': [10.0, 20.0, 30.0],
+        'createdAt_challengesubmissions': pd.to_datetime(['2024-01-01', '2024-01-01', '2024-01-02']),
+    })
+
+
+def test_missing_status_counts_as_not_approved():
+    df = _submissions()
+    kpis = compute_kpis(df)
+    assert kpis['approval_rate'] == kpis['conversion_rate'] == 1 / 3
+
+    running = RunningKpis()
+    running.update(df)
+    assert running.kpis()['approval_rate'] == kpis['approval_rate']
+
+
+def test_claims_skip_missing_status():
+    claims = compute_claims_over_time(_submissions())
+    assert claims['count'].sum() == 1
+
+
+def test_run_sections_skips_missing_columns_and_keeps_order():
+    def slow(df):
+        time.sleep(0.05)
+        return 'slow'
+
+    sections = [
+        Section('first', slow, ('a',)),
+        Section('skipped', lambda df: 'never', ('missing',)),
+        Section('second', lambda df: len(df), ('a',)),
+        Section('other', lambda df: list(df.columns), ('b',), source='other'),
+    ]
+    inputs = {'data': pd.DataFrame({'a': [1, 2, 3]}), 'other': pd.DataFrame({'b': [1]})}
+    results = run_sections(sections, inputs)
+    assert list(results) == ['first', 'second', 'other']
+    assert results == {'first': 'slow', 'second': 3, 'other': ['b']}
+
+
+def test_run_sections_accepts_a_single_frame():
+    results = run_sections([Section('rows', len, ('a',))], pd.DataFrame({'a': [1, 2]}))
+    assert results == {'rows': 2}
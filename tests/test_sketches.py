@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+from schema import TEXT
+from sketches import DistinctCube, daily_cubes, daily_mask
+
+
+def _rows(n=20_000, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = pd.DataFrame({
+        'user': rng.integers(0, n // 2, n).astype(str),
+        'campaign': rng.choice(['a', 'b', 'c'], n),
+        'wilaya': rng.choice(['w1', 'w2', 'w3', 'w4'], n),
+        'createdAt': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 30, n), unit='D'),
+    })
+    # Missing keys and values
+    rows.loc[rng.random(n) < 0.05, 'campaign'] = None
+    rows.loc[rng.random(n) < 0.05, 'wilaya'] = None
+    rows.loc[rng.random(n) < 0.05, 'createdAt'] = pd.NaT
+    rows.loc[rng.random(n) < 0.05, 'user'] = None
+    # Text columns are read with the schema's Arrow string dtype
+    return rows.astype({'user': TEXT, 'campaign': TEXT, 'wilaya': TEXT})
+
+
+def test_count_matches_nunique_with_null_keys():
+    rows = _rows()
+    cube = DistinctCube(rows, 'user', ['campaign', 'wilaya'])
+    assert cube.count() == rows['user'].nunique()
+
+    mask = cube.keys['campaign'].eq('a').fillna(False).to_numpy(dtype=bool)
+    assert cube.count(mask) == rows.loc[rows['campaign'] == 'a', 'user'].nunique()
+
+
+def test_count_by_matches_groupby_nunique():
+    rows = _rows()
+    cube = DistinctCube(rows, 'user', ['campaign', 'wilaya'])
+    expected = rows.groupby('wilaya')['user'].nunique()
+    result = cube.count_by('wilaya')
+    pd.testing.assert_series_equal(result.sort_index(), expected.sort_index(), check_names=False)
+
+
+def test_daily_cubes_count_rows_without_a_date():
+    rows = _rows()
+    cubes = daily_cubes(rows, ['user'], 'createdAt', by=['campaign'])
+    assert cubes['user'].count() == rows['user'].nunique()
+
+    # Date filters leave out rows without a date, like a date-range mask does
+    keys = cubes['user'].keys
+    mask = (keys['day'] >= pd.Timestamp('2024-01-01').date()).to_numpy()
+    assert cubes['user'].count(mask) == rows.loc[rows['createdAt'].notna(), 'user'].nunique()
+
+
+def test_daily_mask_skips_null_keys():
+    rows = _rows()
+    cube = daily_cubes(rows, ['user'], 'createdAt', by=['campaign'])['user']
+    start, end = pd.Timestamp('2024-01-05').date(), pd.Timestamp('2024-01-20').date()
+    mask = daily_mask(cube, start, end, {'campaign': 'b'})
+    assert mask.dtype == bool
+
+    days = rows['createdAt'].dt.date
+    selected = (days >= start) & (days <= end) & rows['campaign'].eq('b').fillna(False)
+    assert cube.count(mask) == rows.loc[selected, 'user'].nunique()
+
+
+def test_estimates_are_close_to_nunique():
+    rows = _rows(n=200_000)
+    cube = DistinctCube(rows, 'user', ['campaign', 'wilaya'], exact_threshold=0)
+    # Standard error is ~0.8%; raw HyperLogLog is also biased by a few
+    # percent just above the linear-counting range
+    assert abs(cube.count() / rows['user'].nunique() - 1) < 0.05
+
+    expected = rows.groupby('campaign')['user'].nunique()
+    result = cube.count_by('campaign').reindex(expected.index)
+    assert ((result / expected - 1).abs() < 0.05).all()